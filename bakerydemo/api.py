@@ -1,8 +1,91 @@
+import hashlib
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, has_vary_header
+from django.utils.http import quote_etag
 from wagtail.api.v2.router import WagtailAPIRouter
 from wagtail.api.v2.views import PagesAPIViewSet
 from wagtail.documents.api.v2.views import DocumentsAPIViewSet
 from wagtail.images.api.v2.views import ImagesAPIViewSet
 
+from bakerydemo.base.cache import API_RESPONSES, make_key
+
+# Cached responses are replaced whenever a page is published, unpublished,
+# moved or deleted, or an image or document is changed (see
+# base/signal_handlers.py), so this only limits how long unused ones are kept
+API_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class CachedAPIViewSetMixin:
+    """
+    Caches the content of successful GET responses rendered as JSON for
+    anonymous users, keyed by the URL and Accept header, so a repeated request
+    is answered without querying or serialising anything.
+
+    Each of these responses has a strong ETag, the hash of its content, and
+    requests with a matching If-None-Match header get an empty 304 instead.
+    """
+
+    def get_cache_key(self, request):
+        url = f"{request.build_absolute_uri()}|{request.headers.get('Accept', '')}"
+        return make_key(
+            "api",
+            self.name,
+            hashlib.sha1(url.encode()).hexdigest(),
+            namespace=API_RESPONSES,
+        )
+
+    def is_cacheable_request(self, request):
+        # The browsable API shows the logged in user and a CSRF token, so
+        # only responses for anonymous users are shared
+        return request.method == "GET" and not request.user.is_authenticated
+
+    def is_cacheable_response(self, response):
+        return (
+            response.status_code == 200
+            and response.accepted_renderer.format == "json"
+            and not has_vary_header(response, "Cookie")
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.is_cacheable_request(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        # The key is made before the response is rendered, so a response
+        # rendered while its content changes is stored under the previous
+        # generation and never served
+        cache_key = self.get_cache_key(request)
+        entry = cache.get(cache_key)
+        if entry is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if not self.is_cacheable_response(response):
+                return response
+            response.render()
+            entry = {
+                "content": response.content,
+                "content_type": response["Content-Type"],
+                "etag": quote_etag(hashlib.sha1(response.content).hexdigest()),
+            }
+            cache.set(cache_key, entry, API_CACHE_TIMEOUT)
+
+        response = HttpResponse(entry["content"], content_type=entry["content_type"])
+        response["ETag"] = entry["etag"]
+        return get_conditional_response(request, etag=entry["etag"], response=response)
+
+
+class CachedPagesAPIViewSet(CachedAPIViewSetMixin, PagesAPIViewSet):
+    pass
+
+
+class CachedImagesAPIViewSet(CachedAPIViewSetMixin, ImagesAPIViewSet):
+    pass
+
+
+class CachedDocumentsAPIViewSet(CachedAPIViewSetMixin, DocumentsAPIViewSet):
+    pass
+
+
 # Create the router. "wagtailapi" is the URL namespace
 api_router = WagtailAPIRouter("wagtailapi")
 
@@ -10,6 +93,6 @@ api_router = WagtailAPIRouter("wagtailapi")
 # The first parameter is the name of the endpoint (eg. pages, images). This
 # is used in the URL of the endpoint
 # The second parameter is the endpoint class that handles the requests
-api_router.register_endpoint("pages", PagesAPIViewSet)
-api_router.register_endpoint("images", ImagesAPIViewSet)
-api_router.register_endpoint("documents", DocumentsAPIViewSet)
+api_router.register_endpoint("pages", CachedPagesAPIViewSet)
+api_router.register_endpoint("images", CachedImagesAPIViewSet)
+api_router.register_endpoint("documents", CachedDocumentsAPIViewSet)
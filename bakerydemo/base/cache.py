@@ -0,0 +1,76 @@
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+# Cached fragments are grouped into namespaces, each with a "generation" token
+# stored in the cache. The token is part of every key in the namespace, so
+# replacing it orphans all entries at once instead of tracking and deleting
+# individual keys. Orphaned entries simply expire.
+PAGE_TREE = "page-tree"
+FOOTER_TEXT = "footer-text"
+SEARCH_INDEX = "search-index"
+LOCATIONS = "locations"
+API_RESPONSES = "api-responses"
+
+
+def _generation_key(namespace):
+    return f"bakerydemo:generation:{namespace}"
+
+
+def _new_generation():
+    return uuid.uuid4().hex
+
+
+def get_generation(namespace):
+    return cache.get_or_set(_generation_key(namespace), _new_generation, timeout=None)
+
+
+def bump_generation(namespace):
+    cache.set(_generation_key(namespace), _new_generation(), timeout=None)
+
+
+def make_key(name, *parts, namespace):
+    """
+    Returns a cache key for `name` and `parts` which is invalidated whenever
+    the generation of `namespace` is bumped.
+    """
+    return ":".join(
+        str(part) for part in ("bakerydemo", name, get_generation(namespace), *parts)
+    )
+
+
+class LRUCache:
+    """
+    A small, thread-safe, in-process cache which discards the least recently
+    used entries once it holds more than `maxsize` of them. This suits values
+    that are read on almost every request and are cheap to keep in memory,
+    where even a round trip to the shared cache is worth avoiding.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._data:
+                    self._data.move_to_end(key)
+                    found[key] = self._data[key]
+        return found
+
+    def set_many(self, mapping):
+        with self._lock:
+            for key, value in mapping.items():
+                self._data[key] = value
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
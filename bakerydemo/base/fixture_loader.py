@@ -0,0 +1,235 @@
+import json
+import re
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.core import serializers
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from wagtail.models import ReferenceIndex
+from wagtail.search.backends import get_search_backends
+from wagtail.search.index import get_indexed_models
+
+FIXTURE_CHUNK_SIZE = 64 * 1024
+WHITESPACE = re.compile(r"\s*")
+
+
+def iter_fixture_objects(fixture_file, chunk_size=FIXTURE_CHUNK_SIZE):
+    """
+    Yields the objects of a JSON fixture (a top level array of objects) one
+    at a time, reading the file in chunks rather than parsing it whole.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+
+    while True:
+        chunk = fixture_file.read(chunk_size)
+        buffer += chunk
+        position = 0
+
+        while True:
+            position = WHITESPACE.match(buffer, position).end()
+            if position == len(buffer):
+                break
+
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError("Fixture must contain a JSON array")
+                started = True
+                position += 1
+            elif buffer[position] == ",":
+                position += 1
+            elif buffer[position] == "]":
+                return
+            else:
+                try:
+                    obj, position = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if not chunk:
+                        raise
+                    # The object continues in the next chunk
+                    break
+                yield obj
+
+        buffer = buffer[position:]
+        if not chunk:
+            raise ValueError("Fixture ended before the end of the JSON array")
+
+
+class FixtureLoader:
+    """
+    Loads a JSON fixture, like the `loaddata` command does, with bounded
+    memory and far fewer queries for large fixtures:
+
+    - The fixture is parsed as a stream, and objects are deserialized and
+      inserted in batches of consecutive objects of the same model, with a
+      single INSERT for the new rows of each batch. Rows that already exist
+      are updated one at a time, as with `loaddata`.
+    - Constraint checks are deferred until every object has been inserted.
+    - The search and reference indexes are only updated for the objects that
+      were loaded, instead of being rebuilt for everything.
+
+    Unlike `loaddata`, which sends `pre_save` and `post_save` (with
+    `raw=True`) for every object, signals are only sent for rows that already
+    exist. Those rows are saved raw in the same way as `loaddata` saves them.
+    New rows are inserted without sending `pre_save` or `post_save`, and
+    many-to-many rows for every object are written without `m2m_changed`. Any
+    side effects of signal handlers therefore only happen for updated rows.
+    How long each phase took is recorded in `timings`.
+    """
+
+    def __init__(self, batch_size=500, using=DEFAULT_DB_ALIAS):
+        self.batch_size = batch_size
+        self.using = using
+        self.loaded_pks = defaultdict(list)
+        self.timings = {}
+
+    @contextmanager
+    def timer(self, phase):
+        start_time = time.monotonic()
+        yield
+        self.timings[phase] = time.monotonic() - start_time
+
+    def load(self, fixture_path):
+        connection = connections[self.using]
+
+        with transaction.atomic(using=self.using):
+            with self.timer("Insert objects"):
+                with connection.constraint_checks_disabled():
+                    with open(fixture_path, encoding="utf-8") as fixture_file:
+                        for model, batch in self.iter_batches(
+                            iter_fixture_objects(fixture_file)
+                        ):
+                            self.insert_batch(model, batch)
+                self.reset_sequences(connection)
+
+            with self.timer("Check constraints"):
+                connection.check_constraints(
+                    table_names=[model._meta.db_table for model in self.loaded_pks]
+                )
+
+        with self.timer("Update search index"):
+            self.update_search_index()
+
+        with self.timer("Update reference index"):
+            self.update_reference_index()
+
+    def iter_batches(self, objects):
+        model_label = None
+        batch = []
+        for obj in objects:
+            if batch and (obj["model"] != model_label or len(batch) >= self.batch_size):
+                yield apps.get_model(model_label), batch
+                batch = []
+            model_label = obj["model"]
+            batch.append(obj)
+        if batch:
+            yield apps.get_model(model_label), batch
+
+    def insert_batch(self, model, batch):
+        deserialized_objects = list(
+            serializers.deserialize("python", batch, using=self.using)
+        )
+        manager = model._base_manager.using(self.using)
+        existing_pks = set(
+            manager.filter(
+                pk__in=[deserialized.object.pk for deserialized in deserialized_objects]
+            ).values_list("pk", flat=True)
+        )
+
+        # Saving a DeserializedObject clears its m2m_data
+        m2m_data = {
+            deserialized.object.pk: deserialized.m2m_data or {}
+            for deserialized in deserialized_objects
+        }
+
+        new_objects = []
+        for deserialized in deserialized_objects:
+            obj = deserialized.object
+            if obj.pk is None or obj.pk in existing_pks:
+                deserialized.save(using=self.using, save_m2m=False)
+            else:
+                new_objects.append(obj)
+
+        if new_objects:
+            # Only the model's own table is written, as with a raw save, so
+            # this also works for multi-table inherited models such as pages
+            manager._insert(
+                new_objects,
+                fields=model._meta.local_concrete_fields,
+                raw=True,
+                using=self.using,
+            )
+
+        self.save_m2m(model, m2m_data)
+        self.loaded_pks[model].extend(
+            deserialized.object.pk for deserialized in deserialized_objects
+        )
+
+    def save_m2m(self, model, m2m_data):
+        for field in model._meta.local_many_to_many:
+            related_pks = {
+                pk: data[field.name]
+                for pk, data in m2m_data.items()
+                if field.name in data
+            }
+            if not related_pks:
+                continue
+
+            through = field.remote_field.through
+            source_attname = through._meta.get_field(field.m2m_field_name()).attname
+            target_attname = through._meta.get_field(
+                field.m2m_reverse_field_name()
+            ).attname
+            manager = through._base_manager.using(self.using)
+            manager.filter(**{f"{source_attname}__in": related_pks}).delete()
+            manager.bulk_create(
+                [
+                    through(**{source_attname: pk, target_attname: target_pk})
+                    for pk, target_pks in related_pks.items()
+                    for target_pk in target_pks
+                ]
+            )
+            self.loaded_pks.setdefault(through, [])
+
+    def reset_sequences(self, connection):
+        # Rows were inserted with explicit primary keys, so sequences need
+        # to be moved past them (a no-op on SQLite)
+        sequence_sql = connection.ops.sequence_reset_sql(
+            no_style(), list(self.loaded_pks)
+        )
+        with connection.cursor() as cursor:
+            for sql in sequence_sql:
+                cursor.execute(sql)
+
+    def iter_loaded_objects(self, model, queryset):
+        pks = self.loaded_pks.get(model, [])
+        for batch_start in range(0, len(pks), self.batch_size):
+            yield list(
+                queryset.filter(pk__in=pks[batch_start : batch_start + self.batch_size])
+            )
+
+    def update_search_index(self):
+        search_backends = list(get_search_backends())
+        for model in get_indexed_models():
+            for objects in self.iter_loaded_objects(
+                model, model.get_indexed_objects().using(self.using)
+            ):
+                for backend in search_backends:
+                    backend.add_bulk(model, objects)
+
+    def update_reference_index(self):
+        # Go through models in the same order as rebuild_references_index, as
+        # references found on an object are recorded against the content type
+        # of the model it's first indexed as (e.g. HomePage rather than Page)
+        for model in apps.get_models():
+            if model not in self.loaded_pks or not ReferenceIndex.is_indexed(model):
+                continue
+            for objects in self.iter_loaded_objects(
+                model, model._default_manager.using(self.using)
+            ):
+                for obj in objects:
+                    ReferenceIndex.create_or_update_for_object(obj)
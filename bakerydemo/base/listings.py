@@ -0,0 +1,245 @@
+import datetime
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import DateField, F, Prefetch, Q, Value, Window
+from django.db.models.functions import Coalesce, RowNumber, Substr
+from wagtail.fields import RichTextField
+from wagtail.images import get_image_model
+from wagtail.images.models import Filter
+from wagtail.models import Page
+
+from bakerydemo.base import page_cache
+from bakerydemo.base.pagination import InvalidCursor, KeysetPaginator
+
+# Columns of pages that listing cards never show, which are left out of
+# `get_card_queryset` along with the rich text and StreamFields
+CARD_DEFERRED_FIELDS = [
+    "search_description",
+    "draft_title",
+    "latest_revision",
+    "latest_revision_created_at",
+    "live_revision",
+]
+
+# The query string parameters for the cursor of the page of a listing to show,
+# and for asking for just the next cards and "load more" link of a listing
+LISTING_CURSOR_PARAM = "page"
+LISTING_FRAGMENT_PARAM = "fragment"
+
+
+def prefetch_renditions(queryset, *filter_specs, image_field="image"):
+    """
+    Selects the image of each object in the queryset and prefetches its
+    renditions for the given filter specs, so a listing looks them up in a
+    constant number of queries instead of one per card.
+
+    Filter specs are written the same way as for the `{% picture %}` tag, e.g.
+    "format-{avif,webp,jpeg} fill-180x180-c100", and must match the template
+    exactly for the prefetched renditions to be used.
+
+    Pass `image_field=None` for a queryset of images.
+    """
+    specs = [
+        spec for filter_spec in filter_specs for spec in Filter.expand_spec(filter_spec)
+    ]
+    Rendition = get_image_model().get_rendition_model()
+    renditions = Prefetch(
+        f"{image_field}__renditions" if image_field else "renditions",
+        queryset=Rendition.objects.filter(filter_spec__in=specs),
+    )
+    if image_field is None:
+        return queryset.prefetch_related(renditions)
+    return queryset.select_related(image_field).prefetch_related(renditions)
+
+
+def get_card_queryset(queryset, *filter_specs):
+    """
+    Trims a queryset of specific pages to what a listing card shows: the
+    rich text and StreamFields, which are often the largest columns and are
+    costly to decode, are deferred along with `CARD_DEFERRED_FIELDS`. Any
+    fields named in the page type's `listing_select_related` are selected,
+    and if it has an `image`, the image is selected and its renditions for
+    the given filter specs are prefetched (see `prefetch_renditions`).
+    """
+    model = queryset.model
+    rich_text_fields = [
+        field.name
+        for field in model._meta.concrete_fields
+        if isinstance(field, RichTextField)
+    ]
+    queryset = (
+        queryset.defer_streamfields()
+        .defer(*CARD_DEFERRED_FIELDS, *rich_text_fields)
+        .select_related(*getattr(model, "listing_select_related", ()))
+    )
+
+    try:
+        model._meta.get_field("image")
+    except FieldDoesNotExist:
+        return queryset
+    return prefetch_renditions(queryset, *filter_specs)
+
+
+def prefetch_authors(queryset, relationship, *filter_specs):
+    """
+    Prefetches the live authors of each page in the queryset through the
+    `relationship` to people (e.g. "blog_person_relationship"), with their
+    images selected and, if filter specs are given, the renditions of the
+    images prefetched (see `prefetch_renditions`). This takes one query for
+    the whole listing, or two with renditions, instead of one per page.
+
+    The relationships are stored on each page as `_prefetched_authors`, which
+    the `authors()` method of the page uses instead of querying.
+    """
+    relationships = queryset.model._meta.get_field(relationship).related_model.objects
+    relationships = relationships.filter(person__live=True).select_related(
+        "person__image"
+    )
+    if filter_specs:
+        relationships = prefetch_renditions(
+            relationships, *filter_specs, image_field="person__image"
+        )
+    return queryset.prefetch_related(
+        Prefetch(relationship, queryset=relationships, to_attr="_prefetched_authors")
+    )
+
+
+def get_specific_pages(pages, *filter_specs):
+    """
+    Returns the specific instances of the given pages, in the same order.
+
+    Unlike `page.specific`, which fetches each page on its own, this takes a
+    single query per page type, with the content type and any fields named in
+    the page type's `listing_select_related` selected and, for page types with
+    an `image`, the image and its renditions for the given filter specs
+    prefetched (see `prefetch_renditions`).
+    """
+    pks_by_model = defaultdict(list)
+    for page in pages:
+        if page.specific_class is not None:
+            pks_by_model[page.specific_class].append(page.pk)
+
+    specific_pages = {}
+    for model, pks in pks_by_model.items():
+        queryset = model.objects.filter(pk__in=pks).select_related(
+            "content_type", *getattr(model, "listing_select_related", ())
+        )
+        try:
+            model._meta.get_field("image")
+        except FieldDoesNotExist:
+            pass
+        else:
+            queryset = prefetch_renditions(queryset, *filter_specs)
+        specific_pages.update((page.pk, page) for page in queryset)
+
+    return [specific_pages.get(page.pk, page) for page in pages]
+
+
+def get_live_children(parents, limit):
+    """
+    Returns a dict of the first `limit` live children, in tree order, of each
+    of the given pages, keyed by the parent's ID, using a single query.
+
+    The children are generic `Page` instances; see `get_specific_pages`.
+    """
+    parent_ids = {parent.path: parent.pk for parent in parents}
+    children = {parent_id: [] for parent_id in parent_ids.values()}
+    if not parent_ids:
+        return children
+
+    queryset = (
+        Page.objects.live()
+        .filter(
+            reduce(
+                or_,
+                (
+                    Q(path__startswith=path, depth=len(path) // Page.steplen + 1)
+                    for path in parent_ids
+                ),
+            )
+        )
+        .annotate(
+            parent_path=Substr("path", 1, (F("depth") - 1) * Page.steplen),
+            position=Window(
+                RowNumber(),
+                partition_by=Substr("path", 1, (F("depth") - 1) * Page.steplen),
+                order_by="path",
+            ),
+        )
+        .filter(position__lte=limit)
+        .order_by("path")
+    )
+    for child in queryset:
+        children[parent_ids[child.parent_path]].append(child)
+
+    # A page's children change when one of them is published or unpublished
+    for parent in parents:
+        page_cache.record_dependency(page_cache.get_children_surrogate_key(parent))
+    return children
+
+
+def order_by_date_published(queryset):
+    """
+    Sorts a queryset of pages with a `date_published` by it, newest first,
+    with undated pages last, by annotating a non-null `listing_date` that
+    `PaginatedListingMixin` can paginate on with ("-listing_date", "-id").
+    """
+    return queryset.annotate(
+        listing_date=Coalesce(
+            "date_published", Value(datetime.date.min), output_field=DateField()
+        )
+    ).order_by("-listing_date", "-id")
+
+
+class PaginatedListingMixin:
+    """
+    For index pages that list cards for their children a page at a time.
+
+    Pages are fetched with a `KeysetPaginator`, so each costs the same however
+    deep it is, and each response holds at most `listing_per_page` cards. The
+    page is given by the cursor in the `page` parameter, and any invalid
+    cursor shows the first page.
+
+    Requests with the `fragment` parameter render only the cards of that page
+    and the "load more" link to the next one, with
+    includes/listing-fragment.html, so that the cards can be added to the
+    listing already shown rather than loading the whole page again.
+
+    Subclasses set `listing_context_name` and `listing_cards_template`, the
+    template that renders the cards in the context variable of that name, and
+    pass their queryset to `get_listing_context` in `get_context`.
+    """
+
+    listing_context_name = "listing"
+    listing_cards_template = None
+    listing_ordering = ("-first_published_at", "-id")
+    listing_per_page = 12
+
+    def paginate_listing(self, request, queryset):
+        paginator = KeysetPaginator(
+            queryset, self.listing_per_page, ordering=self.listing_ordering
+        )
+        try:
+            return paginator.page(request.GET.get(LISTING_CURSOR_PARAM))
+        except InvalidCursor:
+            return paginator.page()
+
+    def get_listing_context(self, request, queryset):
+        listing = self.paginate_listing(request, queryset)
+        return {
+            self.listing_context_name: listing,
+            "listing": listing,
+            "listing_cards_template": self.listing_cards_template,
+            "listing_cursor_param": LISTING_CURSOR_PARAM,
+        }
+
+    def is_listing_fragment_request(self, request):
+        return LISTING_FRAGMENT_PARAM in request.GET
+
+    def get_template(self, request, *args, **kwargs):
+        if self.is_listing_fragment_request(request):
+            return "includes/listing-fragment.html"
+        return super().get_template(request, *args, **kwargs)
@@ -1,12 +1,21 @@
 import random
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import django
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.db.models import F
 from django.utils import lorem_ipsum, timezone
 from django.utils.text import slugify
 from wagtail.images.models import Image
+from wagtail.models import Page, ReferenceIndex, get_root_collection_id
 from wagtail.rich_text import RichText
+from wagtail.search.backends import get_search_backends
+from wagtail.utils.file import hash_filelike
 from willow.image import Image as WillowImage
 
 from bakerydemo.base.models import FooterText, HomePage, Person, StandardPage
@@ -23,6 +32,35 @@ from bakerydemo.locations.models import LocationPage, LocationsIndexPage
 FIXTURE_MEDIA_DIR = Path(settings.PROJECT_DIR) / "base/fixtures/media/original_images"
 
 
+def init_image_worker():
+    # Worker processes started with "spawn" (the default on macOS) don't
+    # inherit the configured app registry
+    django.setup()
+
+
+def store_image_file(source_path):
+    """
+    Reads the dimensions, size and hash of an image file and copies it to
+    storage, returning the field values for its `Image` row. Runs in a worker
+    process, so it doesn't touch the database.
+    """
+    with source_path.open(mode="rb") as image_file:
+        width, height = WillowImage.open(image_file).get_size()
+        image_file.seek(0)
+        file_hash = hash_filelike(image_file)
+        image_file.seek(0)
+        storage = Image._meta.get_field("file").storage
+        file_name = storage.save(Image().get_upload_to(source_path.name), image_file)
+
+    return {
+        "file": file_name,
+        "width": width,
+        "height": height,
+        "file_size": source_path.stat().st_size,
+        "file_hash": file_hash,
+    }
+
+
 class Command(BaseCommand):
     help = "Creates random data. Useful for performance or load testing."
 
@@ -42,88 +80,204 @@ class Command(BaseCommand):
             type=int,
             help="How many images to create",
         )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help=(
+                "Insert pages in batches, deferring search and reference "
+                "indexing to a single pass at the end. Much faster for large "
+                "page counts."
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help=(
+                "How many pages or images to insert per batch with --bulk or "
+                "--workers"
+            ),
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help=(
+                "How many worker processes to read and store image files with. "
+                "Images are created one at a time when this is 1."
+            ),
+        )
 
     def fake_stream_field(self):
         return [("paragraph_block", RichText("\n".join(lorem_ipsum.paragraphs(5))))]
 
-    def get_random_model(self, model):
-        return model.objects.order_by("?").first()
+    def get_random_id(self, model):
+        if self.bulk:
+            # Pick from IDs loaded once per model, rather than querying with
+            # ORDER BY ? for every foreign key of every page
+            if model not in self.candidate_ids:
+                self.candidate_ids[model] = list(
+                    model.objects.values_list("pk", flat=True)
+                )
+            return random.choice(self.candidate_ids[model] or [None])
+        return model.objects.order_by("?").values_list("pk", flat=True).first()
 
     def make_title(self):
         return lorem_ipsum.words(4, common=False)
 
+    def make_bread_page(self):
+        title = self.make_title()
+        return BreadPage(
+            title=title,
+            slug=slugify(title),
+            introduction=lorem_ipsum.paragraph(),
+            bread_type_id=self.get_random_id(BreadType),
+            body=self.fake_stream_field(),
+            origin_id=self.get_random_id(Country),
+            image_id=self.get_random_id(Image),
+        )
+
+    def make_location_page(self):
+        title = self.make_title()
+        return LocationPage(
+            title=title,
+            slug=slugify(title),
+            introduction=lorem_ipsum.paragraph(),
+            image_id=self.get_random_id(Image),
+            address=lorem_ipsum.paragraph(),
+            body=self.fake_stream_field(),
+            lat_long="64.144367, -21.939182",
+            # Bulk inserts don't call save(), which parses these from lat_long
+            latitude=64.144367,
+            longitude=-21.939182,
+        )
+
+    def make_blog_page(self):
+        title = self.make_title()
+        return BlogPage(
+            title=title,
+            slug=slugify(title),
+            introduction=lorem_ipsum.paragraph(),
+            body=self.fake_stream_field(),
+            subtitle=lorem_ipsum.words(10, common=False),
+            date_published=timezone.now(),
+        )
+
+    def make_standard_page(self):
+        title = self.make_title()
+        return StandardPage(
+            title=title,
+            slug=slugify(title),
+            introduction=lorem_ipsum.paragraph(),
+            image_id=self.get_random_id(Image),
+            body=self.fake_stream_field(),
+        )
+
+    def add_children(self, parent, make_page, count):
+        if self.bulk:
+            self.bulk_add_children(parent, make_page, count)
+        else:
+            for _ in range(count):
+                parent.add_child(instance=make_page())
+
+    def bulk_add_children(self, parent, make_page, count):
+        """
+        Adds `count` pages built by `make_page` under `parent`, working out
+        their tree paths in memory and inserting them in batches, instead of
+        re-reading the parent for every page as `add_child` does. Signals
+        aren't sent, so search and reference indexing is left to
+        `update_indexes`.
+        """
+        parent = Page.objects.get(pk=parent.pk)
+        last_child = parent.get_last_child()
+        next_step = last_child._get_lastpos_in_path() + 1 if last_child else 1
+        slugs = set(parent.get_children().values_list("slug", flat=True))
+        now = timezone.now()
+
+        for batch_start in range(0, count, self.batch_size):
+            pages = []
+            for _ in range(min(self.batch_size, count - batch_start)):
+                page = make_page()
+                page.slug = self.make_unique_slug(page.slug, slugs)
+                page.depth = parent.depth + 1
+                page.path = Page._get_path(parent.path, page.depth, next_step)
+                page.numchild = 0
+                page.url_path = f"{parent.url_path}{page.slug}/"
+                page.locale_id = parent.locale_id
+                page.draft_title = page.title
+                page.live = True
+                page.first_published_at = page.last_published_at = now
+                next_step += 1
+                pages.append(page)
+
+            model = type(pages[0])
+            with transaction.atomic():
+                # Django can't bulk create multi-table inherited models, so
+                # insert the Page rows first, then the specific rows pointing
+                # to them
+                base_pages = Page.objects.bulk_create(
+                    [
+                        Page(
+                            **{
+                                field.attname: getattr(page, field.attname)
+                                for field in Page._meta.concrete_fields
+                            }
+                        )
+                        for page in pages
+                    ]
+                )
+                for page, base_page in zip(pages, base_pages):
+                    page.id = page.pk = base_page.pk
+                model._base_manager._insert(
+                    pages, fields=model._meta.local_concrete_fields
+                )
+                Page.objects.filter(pk=parent.pk).update(
+                    numchild=F("numchild") + len(pages)
+                )
+            self.bulk_created_ids[model].extend(page.pk for page in pages)
+
+    def make_unique_slug(self, slug, slugs):
+        unique_slug = slug
+        suffix = 1
+        while unique_slug in slugs:
+            suffix += 1
+            unique_slug = f"{slug}-{suffix}"
+        slugs.add(unique_slug)
+        return unique_slug
+
+    def update_indexes(self):
+        self.stdout.write("Updating search and reference indexes...")
+        search_backends = list(get_search_backends())
+        for model, ids in self.bulk_created_ids.items():
+            for batch_start in range(0, len(ids), self.batch_size):
+                objects = list(
+                    model.objects.filter(
+                        pk__in=ids[batch_start : batch_start + self.batch_size]
+                    )
+                )
+                for backend in search_backends:
+                    backend.add_bulk(model, objects)
+                for obj in objects:
+                    ReferenceIndex.create_or_update_for_object(obj)
+
     def create_pages(self, page_count):
         self.stdout.write("Creating bread pages...")
         breads_index = BreadsIndexPage.objects.live().first()
-        for _ in range(page_count):
-            title = self.make_title()
-            breads_index.add_child(
-                instance=BreadPage(
-                    title=title,
-                    slug=slugify(title),
-                    introduction=lorem_ipsum.paragraph(),
-                    bread_type=self.get_random_model(BreadType),
-                    body=self.fake_stream_field(),
-                    origin=self.get_random_model(Country),
-                    image=self.get_random_model(Image),
-                )
-            )
+        self.add_children(breads_index, self.make_bread_page, page_count)
 
         self.stdout.write("Creating location pages...")
         locations_index = LocationsIndexPage.objects.live().first()
-        for _ in range(page_count):
-            title = self.make_title()
-            locations_index.add_child(
-                instance=LocationPage(
-                    title=title,
-                    slug=slugify(title),
-                    introduction=lorem_ipsum.paragraph(),
-                    image=self.get_random_model(Image),
-                    address=lorem_ipsum.paragraph(),
-                    body=self.fake_stream_field(),
-                    lat_long="64.144367, -21.939182",
-                )
-            )
+        self.add_children(locations_index, self.make_location_page, page_count)
 
         self.stdout.write("Creating blog pages...")
         blog_index = BlogIndexPage.objects.live().first()
-        for _ in range(page_count):
-            title = self.make_title()
-            blog_index.add_child(
-                instance=BlogPage(
-                    title=title,
-                    slug=slugify(title),
-                    introduction=lorem_ipsum.paragraph(),
-                    body=self.fake_stream_field(),
-                    subtitle=lorem_ipsum.words(10, common=False),
-                    date_published=timezone.now(),
-                )
-            )
+        self.add_children(blog_index, self.make_blog_page, page_count)
 
         self.stdout.write("Creating standard pages...")
         homepage = HomePage.objects.live().first()
-        title = self.make_title()
         # Nest the standard pages under a top level one
-        top_level_page = homepage.add_child(
-            instance=StandardPage(
-                title=title,
-                slug=slugify(title),
-                introduction=lorem_ipsum.paragraph(),
-                image=self.get_random_model(Image),
-                body=self.fake_stream_field(),
-            )
-        )
-        for _ in range(page_count):
-            title = self.make_title()
-            top_level_page.add_child(
-                instance=StandardPage(
-                    title=title,
-                    slug=slugify(title),
-                    introduction=lorem_ipsum.paragraph(),
-                    image=self.get_random_model(Image),
-                    body=self.fake_stream_field(),
-                )
-            )
+        top_level_page = homepage.add_child(instance=self.make_standard_page())
+        self.add_children(top_level_page, self.make_standard_page, page_count)
 
     def create_snippets(self, snippet_count):
         self.stdout.write("Creating countries...")
@@ -144,7 +298,7 @@ class Command(BaseCommand):
                 first_name=lorem_ipsum.words(1, common=False),
                 last_name=lorem_ipsum.words(1, common=False),
                 job_title=lorem_ipsum.words(1, common=False),
-                image=self.get_random_model(Image),
+                image_id=self.get_random_id(Image),
             )
 
         self.stdout.write("Creating footer text...")
@@ -155,21 +309,79 @@ class Command(BaseCommand):
         image_files = list(FIXTURE_MEDIA_DIR.iterdir())
 
         self.stdout.write("Creating images...")
-        for _ in range(image_count):
-            random_image = random.choice(image_files)
-            with random_image.open(mode="rb") as image_file:
-                willow_image = WillowImage.open(image_file)
-                width, height = willow_image.get_size()
-                image = Image.objects.create(
-                    title=self.make_title(),
-                    width=width,
-                    height=height,
-                    file_size=random_image.stat().st_size,
+        start_time = time.monotonic()
+        if self.workers > 1:
+            self.create_images_in_parallel(
+                [random.choice(image_files) for _ in range(image_count)]
+            )
+        else:
+            for _ in range(image_count):
+                random_image = random.choice(image_files)
+                with random_image.open(mode="rb") as image_file:
+                    willow_image = WillowImage.open(image_file)
+                    width, height = willow_image.get_size()
+                    image = Image.objects.create(
+                        title=self.make_title(),
+                        width=width,
+                        height=height,
+                        file_size=random_image.stat().st_size,
+                    )
+                    image_file.seek(0)
+                    image.file.save(random_image.name, image_file)
+
+        elapsed = time.monotonic() - start_time
+        if image_count:
+            self.stdout.write(
+                f"Created {image_count} images in {elapsed:.1f}s "
+                f"({image_count / elapsed:.1f} images/sec)"
+            )
+
+    def create_images_in_parallel(self, source_paths):
+        """
+        Fans out decoding, hashing and storage writes, which dominate when
+        storage is remote, to a pool of worker processes, and inserts the
+        `Image` rows for their results in batches. As with --bulk, indexing
+        is left to `update_indexes`.
+        """
+        collection_id = get_root_collection_id()
+
+        # Forked workers mustn't share the parent's database connections
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=self.workers, initializer=init_image_worker
+        ) as executor:
+            results = executor.map(
+                store_image_file,
+                source_paths,
+                chunksize=max(1, len(source_paths) // (self.workers * 4)),
+            )
+            images = []
+            for result in results:
+                images.append(
+                    Image(
+                        title=self.make_title(), collection_id=collection_id, **result
+                    )
                 )
-                image_file.seek(0)
-                image.file.save(random_image.name, image_file)
+                if len(images) >= self.batch_size:
+                    self.bulk_create_images(images)
+                    images = []
+            if images:
+                self.bulk_create_images(images)
+
+    def bulk_create_images(self, images):
+        created = Image.objects.bulk_create(images)
+        self.bulk_created_ids[Image].extend(image.pk for image in created)
 
     def handle(self, **options):
+        self.bulk = options["bulk"]
+        self.batch_size = options["batch_size"]
+        self.workers = options["workers"]
+        self.candidate_ids = {}
+        self.bulk_created_ids = defaultdict(list)
+
         self.create_images(options["image_count"])
         self.create_snippets(options["snippet_count"])
         self.create_pages(options["page_count"])
+
+        if self.bulk_created_ids:
+            self.update_indexes()
@@ -1,34 +1,131 @@
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from django.conf import settings
 from django.core.files.storage import FileSystemStorage, default_storage
-from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from wagtail.models import Page, Site
+from wagtail.utils.file import hash_filelike
+
+from bakerydemo.base.fixture_loader import FixtureLoader
+
+FIXTURES_DIR = os.path.join(settings.PROJECT_DIR, "base", "fixtures")
+FIXTURE_FILE = os.path.join(FIXTURES_DIR, "bakerydemo.json")
+
+# Records the hash of each media file copied to default_storage, so that an
+# interrupted load can resume without copying those files again. It's kept in
+# the project root rather than in storage, where it would be served publicly
+MANIFEST_PATH = os.path.join(settings.BASE_DIR, ".load_initial_data.json")
+MANIFEST_SAVE_INTERVAL = 100
 
 
 class Command(BaseCommand):
-    def _copy_files(self, local_storage, path):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="How many media files to copy to storage at once",
+        )
+        parser.add_argument(
+            "--media-only",
+            action="store_true",
+            help="Only copy the media files linked from the initial data to storage",
+        )
+
+    def _list_files(self, local_storage, path):
         """
-        Recursively copy files from local_storage to default_storage. Used
-        to automatically bootstrap the media directory (both locally and on
-        cloud providers) with the images linked from the initial data (and
-        included in MEDIA_ROOT).
+        Recursively list the files in local_storage, which holds the images
+        linked from the initial data.
         """
         directories, file_names = local_storage.listdir(path)
         for directory in directories:
-            self._copy_files(local_storage, path + directory + "/")
+            yield from self._list_files(local_storage, path + directory + "/")
         for file_name in file_names:
-            with local_storage.open(path + file_name) as file_:
-                default_storage.save(path + file_name, file_)
+            yield path + file_name
 
-    def handle(self, **options):
-        fixtures_dir = os.path.join(settings.PROJECT_DIR, "base", "fixtures")
-        fixture_file = os.path.join(fixtures_dir, "bakerydemo.json")
+    def _load_manifest(self):
+        try:
+            with open(MANIFEST_PATH) as manifest_file:
+                return json.load(manifest_file)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest):
+        # Write to a temporary file first, so an interrupted save never leaves
+        # a truncated manifest behind
+        with open(f"{MANIFEST_PATH}.tmp", "w") as manifest_file:
+            json.dump(manifest, manifest_file)
+        os.replace(f"{MANIFEST_PATH}.tmp", MANIFEST_PATH)
+
+    def _copy_file(self, local_storage, path, copied_hash):
+        """
+        Copy a file from local_storage to default_storage, unless a file of
+        the same size and hash is already there. The hash of the stored file
+        is taken from the manifest if it was copied before, to avoid reading
+        it back. Returns the file's hash and whether it was copied.
+        """
+        with local_storage.open(path) as file_:
+            file_hash = hash_filelike(file_)
 
+            if default_storage.exists(path):
+                if default_storage.size(path) == local_storage.size(path):
+                    if copied_hash is None:
+                        with default_storage.open(path) as stored_file:
+                            copied_hash = hash_filelike(stored_file)
+                    if copied_hash == file_hash:
+                        return file_hash, False
+
+                # Otherwise storage would save the file under a new name,
+                # which the initial data doesn't link to
+                default_storage.delete(path)
+
+            file_.seek(0)
+            default_storage.save(path, file_)
+        return file_hash, True
+
+    def _copy_files(self, local_storage, workers):
+        """
+        Copy files from local_storage to default_storage using a pool of
+        threads, as copying is dominated by I/O. Used to automatically
+        bootstrap the media directory (both locally and on cloud providers)
+        with the images linked from the initial data (and included in
+        MEDIA_ROOT).
+        """
+        manifest = self._load_manifest()
+        copied = skipped = 0
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(
+                        self._copy_file, local_storage, path, manifest.get(path)
+                    ): path
+                    for path in self._list_files(local_storage, "")
+                }
+                for future in as_completed(futures):
+                    file_hash, was_copied = future.result()
+                    manifest[futures[future]] = file_hash
+                    if was_copied:
+                        copied += 1
+                    else:
+                        skipped += 1
+                    if (copied + skipped) % MANIFEST_SAVE_INTERVAL == 0:
+                        self._save_manifest(manifest)
+        finally:
+            self._save_manifest(manifest)
+
+        print(  # noqa: T201
+            f"Copied {copied} files, skipped {skipped} already in storage."
+        )
+
+    def handle(self, **options):
         print("Copying media files to configured storage...")  # noqa: T201
-        local_storage = FileSystemStorage(os.path.join(fixtures_dir, "media"))
-        self._copy_files(local_storage, "")  # file storage paths are relative
+        local_storage = FileSystemStorage(os.path.join(FIXTURES_DIR, "media"))
+        self._copy_files(local_storage, options["workers"])
+        if options["media_only"]:
+            return
 
         # Wagtail creates default Site and Page instances during install, but we already have
         # them in the data load. Remove the auto-generated ones.
@@ -37,9 +134,11 @@ class Command(BaseCommand):
         if Page.objects.filter(title="Welcome to your new Wagtail site!").exists():
             Page.objects.get(title="Welcome to your new Wagtail site!").delete()
 
-        call_command("loaddata", fixture_file, verbosity=0)
-        call_command("update_index", verbosity=0)
-        call_command("rebuild_references_index", verbosity=0)
+        print("Loading initial data...")  # noqa: T201
+        loader = FixtureLoader()
+        loader.load(FIXTURE_FILE)
+        for phase, seconds in loader.timings.items():
+            print(f"  {phase}: {seconds:.2f}s")  # noqa: T201
 
         print(  # noqa: T201
             "Awesome. Your data is loaded! The bakery's doors are almost ready to open..."
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from bakerydemo.base.page_cache import DEPENDENCY_MAX_AGE, prune_dependencies
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes the recorded frontend cache dependencies of page URLs that "
+        "haven't been served recently. Run this daily when "
+        "TRACK_PAGE_DEPENDENCIES is enabled."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=DEPENDENCY_MAX_AGE.days,
+            help="Delete the dependencies of URLs not served for this many days.",
+        )
+
+    def handle(self, **options):
+        deleted = prune_dependencies(timedelta(days=options["days"]))
+        self.stdout.write(f"Deleted {deleted} page dependencies")
@@ -1,21 +1,118 @@
+import glob
+import hashlib
+import os
+import subprocess
+import sys
+
 from django.conf import settings
 from django.core.cache import caches
 from django.core.files.storage import default_storage
 from django.core.management import call_command
 from django.core.management.base import BaseCommand, CommandError
-from django.db import DEFAULT_DB_ALIAS
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.loader import MigrationLoader
 from django_extensions.settings import POSTGRESQL_ENGINES
 from wagtail.documents import get_document_model
 from wagtail.images import get_image_model
 
+from bakerydemo.base.management.commands.load_initial_data import FIXTURE_FILE
+
 
 class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--snapshot",
+            action="store_true",
+            help=(
+                "Restore the database from a snapshot taken after the last full "
+                "reset, instead of migrating and loading the initial data again. "
+                "The snapshot is taken automatically, and is replaced whenever "
+                "the migrations or the initial data change. It is kept in the "
+                "directory given by the RESET_DEMO_SNAPSHOT_DIR environment "
+                "variable, or snapshots/ in the project root by default."
+            ),
+        )
+
+    def get_snapshot_path(self):
+        """
+        Returns the path of the snapshot for the current migrations and
+        initial data. Adding or editing either changes the path, so an out of
+        date snapshot is never restored.
+        """
+        fingerprint = hashlib.sha1()
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        for key, migration in sorted(loader.disk_migrations.items()):
+            app_label, migration_name = key
+            fingerprint.update(f"{app_label}.{migration_name}\n".encode())
+            migration_path = sys.modules[migration.__module__].__file__
+            with open(migration_path, "rb") as migration_file:
+                fingerprint.update(migration_file.read())
+        with open(FIXTURE_FILE, "rb") as fixture_file:
+            fingerprint.update(fixture_file.read())
+
+        return os.path.join(
+            settings.RESET_DEMO_SNAPSHOT_DIR,
+            f"bakerydemo-{fingerprint.hexdigest()}.dump",
+        )
+
+    def run_postgres_command(self, args):
+        db_settings = connections[DEFAULT_DB_ALIAS].settings_dict
+        env = os.environ.copy()
+        if db_settings["PASSWORD"]:
+            env["PGPASSWORD"] = str(db_settings["PASSWORD"])
+        for option, key in (
+            ("--host", "HOST"),
+            ("--port", "PORT"),
+            ("--username", "USER"),
+        ):
+            if db_settings[key]:
+                args.append(f"{option}={db_settings[key]}")
+        args.append(f"--dbname={db_settings['NAME']}")
+
+        try:
+            subprocess.run(args, env=env, check=True)
+        except (OSError, subprocess.CalledProcessError) as e:
+            raise CommandError(f"{args[0]} failed: {e}")
+
+    def create_snapshot(self, snapshot_path):
+        self.stdout.write("Creating snapshot")
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+
+        # Snapshots for other migrations or initial data won't be used again
+        for stale_snapshot in glob.glob(
+            os.path.join(os.path.dirname(snapshot_path), "bakerydemo-*.dump")
+        ):
+            os.remove(stale_snapshot)
+
+        # Write to a temporary file first, so an interrupted dump is never
+        # mistaken for a complete snapshot
+        self.run_postgres_command(
+            ["pg_dump", "--format=custom", f"--file={snapshot_path}.tmp"]
+        )
+        os.replace(f"{snapshot_path}.tmp", snapshot_path)
+
+    def restore_snapshot(self, snapshot_path):
+        self.stdout.write("Restoring snapshot")
+        self.run_postgres_command(
+            [
+                "pg_restore",
+                "--clean",
+                "--if-exists",
+                "--no-owner",
+                "--single-transaction",
+                "--exit-on-error",
+                snapshot_path,
+            ]
+        )
+
     def handle(self, **options):
         if settings.DATABASES[DEFAULT_DB_ALIAS]["ENGINE"] not in POSTGRESQL_ENGINES:
             raise CommandError(
                 "This command can be used only with PostgreSQL databases."
             )
 
+        snapshot_path = self.get_snapshot_path() if options["snapshot"] else None
+
         # 1. (optional) Remove all objects from S3
         if "s3" in settings.DEFAULT_FILE_STORAGE:
             self.stdout.write("Removing files from S3")
@@ -31,15 +128,29 @@ class Command(BaseCommand):
         self.stdout.write("Reset schema")
         call_command("reset_schema", interactive=False)
 
-        # 3. Rebuild database
-        call_command("migrate", interactive=False)
+        if snapshot_path and os.path.exists(snapshot_path):
+            # 3. Restore the database, which already includes the initial data
+            self.restore_snapshot(snapshot_path)
+
+            # 4. Clear caches
+            for cache in caches.all():
+                cache.clear()
+
+            # 5. Re-import the media files, which aren't part of the snapshot
+            call_command("load_initial_data", media_only=True)
+        else:
+            # 3. Rebuild database
+            call_command("migrate", interactive=False)
+
+            # 4. Clear caches
+            for cache in caches.all():
+                cache.clear()
 
-        # 4. Clear caches
-        for cache in caches.all():
-            cache.clear()
+            # 5. Re-import data
+            call_command("load_initial_data")
 
-        # 5. Re-import data
-        call_command("load_initial_data")
+            if snapshot_path:
+                self.create_snapshot(snapshot_path)
 
         # 6. Change the admin password (in case it's different in this environment)
         call_command("reset_admin_password")
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.14 on 2026-10-17 14:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("base", "0022_remove_genericsettings_twitter_url_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PageDependency",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("url", models.TextField()),
+                ("surrogate_key", models.CharField(db_index=True, max_length=255)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="pagedependency",
+            constraint=models.UniqueConstraint(
+                fields=("url", "surrogate_key"), name="unique_page_dependency"
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.14 on 2026-10-17 15:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("base", "0023_pagedependency"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pagedependency",
+            name="recorded_at",
+            field=models.DateTimeField(
+                db_index=True, default=django.utils.timezone.now
+            ),
+        ),
+    ]
@@ -3,6 +3,7 @@ from __future__ import unicode_literals
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericRelation
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext as _
 from modelcluster.fields import ParentalKey
 from modelcluster.models import ClusterableModel
@@ -35,6 +36,7 @@ from wagtail.models import (
 from wagtail.search import index
 
 from .blocks import BaseStreamBlock
+from .listings import get_live_children, get_specific_pages
 
 
 class Person(
@@ -393,9 +395,64 @@ class HomePage(Page):
         ),
     ]
 
+    # How many children are shown for each featured section, and the
+    # renditions of the cards they're shown with in templates/base/home_page.html
+    featured_section_limits = [3, 3, 6]
+    featured_section_image_filters = [
+        "format-{avif,webp,jpeg} fill-180x180-c100",
+        "format-{avif,webp,jpeg} fill-{300x320-c100,430x320-c100}",
+        "format-{avif,webp,jpeg} fill-{250x320-c100,433x487-c100}",
+    ]
+
     def __str__(self):
         return self.title
 
+    def get_featured_sections(self):
+        """
+        Returns the title, page and first live children of each featured
+        section, with the specific fields and images of the children. This
+        takes the same number of queries however many children are shown.
+        """
+        sections = [
+            (self.featured_section_1_title, self.featured_section_1_id),
+            (self.featured_section_2_title, self.featured_section_2_id),
+            (self.featured_section_3_title, self.featured_section_3_id),
+        ]
+        section_pages = Page.objects.in_bulk(
+            [page_id for title, page_id in sections if page_id]
+        )
+        children = get_live_children(
+            section_pages.values(), max(self.featured_section_limits)
+        )
+
+        # Fetch the specific pages of all sections together, so that each page
+        # type takes one query
+        specific_pages = get_specific_pages(
+            [
+                child
+                for section_children in children.values()
+                for child in section_children
+            ],
+            *self.featured_section_image_filters,
+        )
+        specific_pages = {page.pk: page for page in specific_pages}
+
+        return [
+            {
+                "title": title,
+                "page": section_pages.get(page_id),
+                "children": [
+                    specific_pages[child.pk] for child in children.get(page_id, [])
+                ][:limit],
+            }
+            for (title, page_id), limit in zip(sections, self.featured_section_limits)
+        ]
+
+    def get_context(self, request, *args, **kwargs):
+        context = super().get_context(request, *args, **kwargs)
+        context["featured_sections"] = self.get_featured_sections()
+        return context
+
 
 class GalleryPage(Page):
     """
@@ -516,6 +573,28 @@ class SiteSettings(BaseSiteSetting):
     ]
 
 
+class PageDependency(models.Model):
+    """
+    Records that the page served at `url` was rendered using the object with
+    the given surrogate key (see `bakerydemo.base.page_cache`), so the URL can
+    be purged from the frontend cache when the object changes.
+
+    `recorded_at` is refreshed while the URL is still being served, and rows
+    that haven't been are removed by the prune_page_dependencies command.
+    """
+
+    url = models.TextField()
+    surrogate_key = models.CharField(max_length=255, db_index=True)
+    recorded_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["url", "surrogate_key"], name="unique_page_dependency"
+            )
+        ]
+
+
 class UserApprovalTaskState(TaskState):
     pass
 
@@ -0,0 +1,421 @@
+"""
+A cache of the full responses of Wagtail pages served to anonymous users.
+
+Each cached response is tagged with "surrogate keys" for the pages, snippets,
+settings and images that went into rendering it. Instances of the tracked
+models record their keys as they're loaded during the request, and code that
+renders values from another cache, or lists the children of a page, records
+the keys it depends on with `record_dependency`.
+
+Every surrogate key has a version in the cache, and a response is only served
+while the versions of all its keys are the ones it was stored with. Purging
+a key replaces its version, which evicts exactly the responses that depend on
+it.
+
+When `TRACK_PAGE_DEPENDENCIES` is enabled, the surrogate keys of each page
+URL are also stored in the database as `PageDependency` rows, so that changes
+to snippets can purge exactly the URLs that show them from the frontend cache.
+Rows are keyed by the canonical URL of the page, keeping only the query string
+parameters in `DEPENDENCY_QUERY_PARAMS`, and those for URLs that haven't been
+served for `DEPENDENCY_MAX_AGE` are removed by `prune_dependencies`.
+"""
+
+import hashlib
+import uuid
+from contextvars import ContextVar
+from datetime import timedelta
+from functools import lru_cache
+from urllib.parse import urlencode, urlsplit
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import DisallowedHost
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from wagtail.contrib.frontend_cache.backends import BaseBackend
+from wagtail.contrib.frontend_cache.utils import PurgeBatch
+from wagtail.images import get_image_model
+from wagtail.models import Page
+
+from bakerydemo.base.cache import bump_generation, get_generation
+
+PAGE_CACHE = "page-cache"
+
+# Models whose instances are recorded as dependencies when they're loaded
+# while rendering a page, in addition to the image model
+TRACKED_MODELS = [
+    "wagtailcore.page",
+    "base.footertext",
+    "base.person",
+    "base.genericsettings",
+    "base.sitesettings",
+    "breads.breadingredient",
+    "breads.breadtype",
+    "breads.country",
+]
+
+# Query string parameters that change what a page shows, e.g. the cursor of
+# a listing or gallery, which are kept in the URLs of recorded dependencies.
+# Other parameters are dropped, so that arbitrary query strings can't add rows.
+DEPENDENCY_QUERY_PARAMS = ["page", "images", "fragment"]
+
+# How often the recorded dependencies of a URL that's still being served are
+# refreshed, and how long after that they're kept once it isn't
+DEPENDENCY_REFRESH_INTERVAL = 60 * 60 * 24
+DEPENDENCY_MAX_AGE = timedelta(days=7)
+
+_dependencies = ContextVar("page_cache_dependencies", default=None)
+_expires = ContextVar("page_cache_expires", default=None)
+
+
+@lru_cache(maxsize=None)
+def get_tracked_models():
+    return tuple(apps.get_model(label) for label in TRACKED_MODELS) + (
+        get_image_model(),
+    )
+
+
+def get_model_surrogate_key(model):
+    """
+    Returns the surrogate key for anything rendered from the set of instances
+    of `model`, rather than specific instances, e.g. "base.footertext".
+    """
+    if issubclass(model, Page):
+        model = Page
+    return model._meta.label_lower
+
+
+def get_surrogate_key(obj):
+    """
+    Returns the surrogate key for `obj`, e.g. "wagtailcore.page:3". Pages use
+    the same key whatever their specific type.
+    """
+    return f"{get_model_surrogate_key(type(obj))}:{obj.pk}"
+
+
+def get_page_surrogate_key(page_id):
+    """
+    Returns the surrogate key for the page with the given ID, for values that
+    are cached without the page itself, e.g. menu items.
+    """
+    return f"{get_model_surrogate_key(Page)}:{page_id}"
+
+
+def get_children_surrogate_key(page):
+    """
+    Returns the surrogate key for listings of the children of `page`, which a
+    page being published, unpublished or moved may add to or remove from.
+    """
+    return f"{get_surrogate_key(page)}:children"
+
+
+def record_dependency(*keys):
+    """
+    Records that the response being rendered depends on the given surrogate
+    keys. Does nothing outside of a cacheable request.
+    """
+    dependencies = _dependencies.get()
+    if dependencies is not None:
+        dependencies.update(keys)
+
+
+def record_expiry(expires):
+    """
+    Records that the response being rendered shows something that changes at
+    `expires` without anything being published, e.g. whether a location is
+    open, so it mustn't be cached beyond then. Does nothing outside of a
+    cacheable request.
+    """
+    current = _expires.get()
+    if _dependencies.get() is not None and (current is None or expires < current):
+        _expires.set(expires)
+
+
+def post_init_handler(sender, instance, **kwargs):
+    if (
+        _dependencies.get() is not None
+        and instance.pk is not None
+        and isinstance(instance, get_tracked_models())
+    ):
+        record_dependency(get_surrogate_key(instance))
+
+
+def get_cache_key(host, full_path):
+    """
+    Returns the page cache key of the response for the given host and full
+    path (including the query string). Pages of every locale have their own
+    URLs, so nothing else is needed to tell them apart.
+    """
+    url = f"{host}|{full_path}"
+    return f"bakerydemo:page-cache:{hashlib.sha1(url.encode()).hexdigest()}"
+
+
+def _version_key(surrogate_key):
+    return f"bakerydemo:page-cache:version:{surrogate_key}"
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def purge(keys):
+    """
+    Evicts every cached response that depends on any of the given surrogate
+    keys.
+    """
+    if not settings.PAGE_CACHE_TIMEOUT:
+        return
+    cache.set_many(
+        {_version_key(key): _new_version() for key in keys},
+        settings.PAGE_CACHE_TIMEOUT,
+    )
+    # Responses rendered while the purge happened may have used the purged
+    # content, so mustn't be stored
+    bump_generation(PAGE_CACHE)
+
+
+def get_dependency_url(request):
+    """
+    Returns the URL that the dependencies of the page served for `request`
+    are recorded under: its absolute URL without any query string parameters
+    other than those in `DEPENDENCY_QUERY_PARAMS`.
+    """
+    params = sorted(
+        (name, value)
+        for name, value in request.GET.items()
+        if name in DEPENDENCY_QUERY_PARAMS
+    )
+    url = request.build_absolute_uri(request.path)
+    return f"{url}?{urlencode(params)}" if params else url
+
+
+def save_dependencies(url, keys):
+    """
+    Replaces the recorded surrogate keys of the page served at `url`.
+
+    The keys last saved for each URL are remembered in the cache for
+    `DEPENDENCY_REFRESH_INTERVAL`, and while they're unchanged nothing is
+    queried or written.
+    """
+    from bakerydemo.base.models import PageDependency
+
+    digest = hashlib.sha1("\n".join(sorted(keys)).encode()).hexdigest()
+    digest_key = (
+        f"bakerydemo:page-dependencies:{hashlib.sha1(url.encode()).hexdigest()}"
+    )
+    if cache.get(digest_key) == digest:
+        return
+
+    now = timezone.now()
+    dependencies = PageDependency.objects.filter(url=url)
+    recorded_keys = set(dependencies.values_list("surrogate_key", flat=True))
+    if recorded_keys - keys:
+        dependencies.exclude(surrogate_key__in=keys).delete()
+    if recorded_keys & keys:
+        # Keep the rows of URLs that are still being served from being pruned
+        dependencies.update(recorded_at=now)
+    PageDependency.objects.bulk_create(
+        [
+            PageDependency(url=url, surrogate_key=key, recorded_at=now)
+            for key in keys - recorded_keys
+        ],
+        ignore_conflicts=True,
+    )
+    cache.set(digest_key, digest, DEPENDENCY_REFRESH_INTERVAL)
+
+
+def prune_dependencies(max_age=DEPENDENCY_MAX_AGE):
+    """
+    Deletes the recorded dependencies of URLs that haven't been served for
+    `max_age`, which the frontend cache no longer holds, and returns how many
+    were deleted.
+    """
+    from bakerydemo.base.models import PageDependency
+
+    deleted, _ = PageDependency.objects.filter(
+        recorded_at__lt=timezone.now() - max_age
+    ).delete()
+    return deleted
+
+
+def purge_frontend_cache(keys):
+    """
+    Purges the URLs of every page recorded as depending on any of the given
+    surrogate keys from the frontend cache, in batches where the backend
+    supports it.
+    """
+    from bakerydemo.base.models import PageDependency
+
+    if not settings.TRACK_PAGE_DEPENDENCIES:
+        return
+    batch = PurgeBatch()
+    batch.add_urls(
+        PageDependency.objects.filter(surrogate_key__in=keys)
+        .values_list("url", flat=True)
+        .distinct()
+    )
+    batch.purge()
+
+
+class PageCacheMiddleware:
+    """
+    Serves anonymous GET requests for Wagtail pages from the page cache,
+    keyed by host and full path. Requests with a session or
+    messages cookie always go through to the view, as do all requests when
+    the `PAGE_CACHE_TIMEOUT` setting is 0.
+
+    Responses that record an expiry with `record_expiry` are cached until
+    then at most, and have their Cache-Control and Surrogate-Control max-age
+    set to the time left (see `get_timeout`).
+
+    When `TRACK_PAGE_DEPENDENCIES` is enabled, the surrogate keys of pages
+    rendered for these requests are also saved with `save_dependencies`.
+
+    This should be placed before SessionMiddleware, so that cached responses
+    are returned without loading the session or user.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        cache_key = self.get_cache_key(request)
+        if cache_key is None:
+            return self.get_response(request)
+
+        if settings.PAGE_CACHE_TIMEOUT:
+            response = self.get_cached_response(cache_key)
+            if response is not None:
+                return response
+
+        generation = get_generation(PAGE_CACHE)
+        token = _dependencies.set(set())
+        expires_token = _expires.set(None)
+        try:
+            response = self.get_response(request)
+            dependencies = _dependencies.get()
+            expires = _expires.get()
+        finally:
+            _dependencies.reset(token)
+            _expires.reset(expires_token)
+
+        if self.is_cacheable_response(request, response):
+            timeout = self.get_timeout(response, expires)
+            if timeout > 0 and get_generation(PAGE_CACHE) == generation:
+                self.set_cached_response(
+                    cache_key, response, dependencies, timeout, expires
+                )
+            if settings.TRACK_PAGE_DEPENDENCIES:
+                save_dependencies(get_dependency_url(request), dependencies)
+        return response
+
+    def get_cache_key(self, request):
+        if (
+            not (settings.PAGE_CACHE_TIMEOUT or settings.TRACK_PAGE_DEPENDENCIES)
+            or request.method != "GET"
+            or settings.SESSION_COOKIE_NAME in request.COOKIES
+            or "messages" in request.COOKIES
+        ):
+            return None
+        try:
+            host = request.get_host()
+        except DisallowedHost:
+            return None
+
+        return get_cache_key(host, request.get_full_path())
+
+    def is_cacheable_response(self, request, response):
+        resolver_match = getattr(request, "resolver_match", None)
+        return (
+            resolver_match is not None
+            and resolver_match.url_name == "wagtail_serve"
+            and response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+        )
+
+    def get_timeout(self, response, expires):
+        """
+        Returns how long `response` can be cached for, which is less than
+        `PAGE_CACHE_TIMEOUT` when it expires sooner, in which case the
+        Cache-Control and Surrogate-Control headers are set to match, to keep
+        the frontend cache and browsers from holding on to it beyond then.
+        """
+        timeout = settings.PAGE_CACHE_TIMEOUT
+        if timeout and expires is not None:
+            timeout = min(
+                timeout, max(0, int((expires - timezone.now()).total_seconds()))
+            )
+            patch_cache_control(response, max_age=timeout, s_maxage=timeout)
+            response["Surrogate-Control"] = f"max-age={timeout}"
+        return timeout
+
+    def get_cached_response(self, cache_key):
+        entry = cache.get(cache_key)
+        if entry is None:
+            return None
+
+        versions = entry["versions"]
+        if cache.get_many([_version_key(key) for key in versions]) != {
+            _version_key(key): version for key, version in versions.items()
+        }:
+            return None
+
+        response = entry["response"]
+        # The time left until the response expires has gone down since it was
+        # stored
+        self.get_timeout(response, entry.get("expires"))
+        return response
+
+    def set_cached_response(
+        self, cache_key, response, dependencies, timeout, expires=None
+    ):
+        version_keys = {_version_key(key): key for key in dependencies}
+        versions = cache.get_many(version_keys)
+        new_versions = {
+            version_key: _new_version()
+            for version_key in version_keys
+            if version_key not in versions
+        }
+        if new_versions:
+            cache.set_many(new_versions, settings.PAGE_CACHE_TIMEOUT)
+            versions.update(new_versions)
+
+        cache.set(
+            cache_key,
+            {
+                # Only the content and headers are kept, not the request,
+                # context or template of a TemplateResponse
+                "response": HttpResponse(
+                    response.content,
+                    status=response.status_code,
+                    headers=response.headers,
+                ),
+                "versions": {
+                    version_keys[version_key]: version
+                    for version_key, version in versions.items()
+                },
+                "expires": expires,
+            },
+            timeout,
+        )
+
+
+class PageCacheBackend(BaseBackend):
+    """
+    A frontend cache backend that evicts URLs from the page cache, for
+    trying out dependency tracking and purging without a CDN, e.g.:
+
+        WAGTAILFRONTENDCACHE = {
+            "default": {
+                "BACKEND": "bakerydemo.base.page_cache.PageCacheBackend",
+            },
+        }
+    """
+
+    def purge(self, url):
+        url = urlsplit(url)
+        full_path = f"{url.path}?{url.query}" if url.query else url.path
+        cache.delete(get_cache_key(url.netloc, full_path))
@@ -0,0 +1,202 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+FORWARD = "n"
+BACKWARD = "p"
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder truncates datetimes to milliseconds, which would
+        # no longer match the stored value exactly
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPaginator:
+    """
+    Paginates a queryset by filtering on the sort key of the last item seen,
+    rather than with an OFFSET, so fetching any page costs the same however
+    deep it is and no COUNT of the whole queryset is needed.
+
+    `ordering` is a sequence of field names, each optionally prefixed with "-"
+    for descending order, which together must be unique and non-null, e.g.
+    ("-first_published_at", "-id"). Pages are identified by opaque cursor
+    tokens, so unlike Django's `Paginator` there are no page numbers or page
+    range, only next and previous pages.
+
+    `count` is only queried when it's used. Pass `count_limit` to stop
+    counting at that many items, so the total can be shown as an estimate
+    (e.g. "1000+") without counting the whole queryset.
+    """
+
+    def __init__(self, queryset, per_page, ordering, count_limit=None):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = [
+            (field.lstrip("-"), field.startswith("-")) for field in ordering
+        ]
+        self.count_limit = count_limit
+
+    @cached_property
+    def count(self):
+        queryset = self.queryset.order_by()
+        if self.count_limit is not None:
+            queryset = queryset[: self.count_limit]
+        return queryset.count()
+
+    @property
+    def count_is_estimate(self):
+        return self.count_limit is not None and self.count >= self.count_limit
+
+    def page(self, cursor=None):
+        """
+        Returns the page for the given cursor token, or the first page if it
+        is empty. Raises `InvalidCursor` for a token that can't be decoded.
+        """
+        if not cursor:
+            return self._get_page(FORWARD, None)
+        direction, values = self.decode_cursor(cursor)
+        return self._get_page(direction, values)
+
+    def _get_page(self, direction, values):
+        backward = direction == BACKWARD
+        queryset = self.queryset.order_by(
+            *(
+                f"-{name}" if descending != backward else name
+                for name, descending in self.ordering
+            )
+        )
+        if values is not None:
+            queryset = queryset.filter(self._after(values, backward))
+
+        # Fetch one extra item to find out whether there's a further page
+        items = list(queryset[: self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[: self.per_page]
+
+        if backward:
+            items.reverse()
+            return KeysetPage(items, self, has_next=True, has_previous=has_more)
+        return KeysetPage(
+            items, self, has_next=has_more, has_previous=values is not None
+        )
+
+    def _after(self, values, backward):
+        # Rows sorting after `values`, i.e. for ("-a", "b") and (x, y):
+        # a < x OR (a = x AND b > y)
+        condition = Q()
+        for index, (name, descending) in reversed(list(enumerate(self.ordering))):
+            lookup = "lt" if descending != backward else "gt"
+            beyond = Q(**{f"{name}__{lookup}": values[index]})
+            if index == len(self.ordering) - 1:
+                condition = beyond
+            else:
+                condition = beyond | (Q(**{name: values[index]}) & condition)
+        return condition
+
+    def get_cursor(self, item, direction):
+        values = [getattr(item, name) for name, descending in self.ordering]
+        data = json.dumps([direction, values], cls=CursorEncoder)
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            direction, values = json.loads(base64.urlsafe_b64decode(padded))
+        except (binascii.Error, TypeError, UnicodeError, ValueError):
+            raise InvalidCursor("That page cursor is not valid")
+        if direction not in (FORWARD, BACKWARD) or not (
+            isinstance(values, list) and len(values) == len(self.ordering)
+        ):
+            raise InvalidCursor("That page cursor is not valid")
+
+        # The values come from the client, so must be checked as strictly as
+        # form input before they're used in a query
+        try:
+            values = [
+                self._clean_value(name, value)
+                for (name, descending), value in zip(self.ordering, values)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            raise InvalidCursor("That page cursor is not valid")
+        return direction, values
+
+    def _get_field(self, name):
+        try:
+            return self.queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Orderings may use annotations, e.g. with a default for nulls
+            return self.queryset.query.annotations[name].output_field
+
+    def _clean_value(self, name, value):
+        field = self._get_field(name)
+        value = field.to_python(value)
+        if value is None:
+            raise ValueError("Cursor values can't be null")
+        if isinstance(value, datetime.datetime) and timezone.is_naive(value):
+            # Cursors are always made with aware datetimes
+            raise ValueError("Cursor datetimes must have a time zone")
+        # e.g. integers out of the range the database supports
+        field.run_validators(value)
+        return value
+
+
+class KeysetPage:
+    """
+    A page of results from a `KeysetPaginator`. It mirrors the navigation
+    methods of Django's `Page`, with `next_page_number` and
+    `previous_page_number` returning cursor tokens, so templates can use it
+    in the same way.
+    """
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next and bool(object_list)
+        self._has_previous = has_previous and bool(object_list)
+
+    def __repr__(self):
+        return f"<KeysetPage of {len(self.object_list)} items>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def next_page_number(self):
+        if not self.has_next():
+            raise InvalidCursor("That page contains no results")
+        return self.paginator.get_cursor(self.object_list[-1], FORWARD)
+
+    def previous_page_number(self):
+        if not self.has_previous():
+            raise InvalidCursor("That page contains no results")
+        return self.paginator.get_cursor(self.object_list[0], BACKWARD)
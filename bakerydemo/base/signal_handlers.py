@@ -0,0 +1,117 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from wagtail.documents import get_document_model
+from wagtail.images import get_image_model
+from wagtail.models import Page
+from wagtail.signals import (
+    page_published,
+    page_unpublished,
+    post_page_move,
+    published,
+    unpublished,
+)
+
+from bakerydemo.base import page_cache
+from bakerydemo.base.cache import (
+    API_RESPONSES,
+    FOOTER_TEXT,
+    PAGE_TREE,
+    SEARCH_INDEX,
+    bump_generation,
+)
+from bakerydemo.base.models import FooterText, GenericSettings, Person, SiteSettings
+from bakerydemo.breads.models import BreadIngredient, BreadType, Country
+
+
+def page_tree_changed_handler(**kwargs):
+    # Any change to a live page can alter the menus and breadcrumbs rendered
+    # around it, so start a new generation of page tree fragments
+    bump_generation(PAGE_TREE)
+
+
+def footer_text_changed_handler(**kwargs):
+    bump_generation(FOOTER_TEXT)
+
+
+def search_index_changed_handler(**kwargs):
+    # Cached search results hold the IDs of matching live pages, which any
+    # change to indexed content may add to, remove from or reorder
+    bump_generation(SEARCH_INDEX)
+
+
+def api_responses_changed_handler(**kwargs):
+    # Cached API responses list live pages, images and documents, and the
+    # details of each
+    bump_generation(API_RESPONSES)
+
+
+def page_cache_page_changed_handler(
+    instance, parent_page_before=None, parent_page_after=None, **kwargs
+):
+    # Evict responses rendered from the page itself, and any listings of the
+    # children of its parent, and of its parent before it was moved, which it
+    # may have been added to or removed from
+    parent_paths = [instance.path[: -Page.steplen]]
+    for parent in (parent_page_before, parent_page_after):
+        if parent is not None:
+            parent_paths.append(parent.path)
+    page_cache.purge(
+        [page_cache.get_surrogate_key(instance)]
+        + [
+            page_cache.get_children_surrogate_key(parent)
+            for parent in Page.objects.filter(path__in=parent_paths).only("pk")
+        ]
+    )
+
+
+def page_cache_object_changed_handler(instance, **kwargs):
+    keys = [
+        page_cache.get_surrogate_key(instance),
+        page_cache.get_model_surrogate_key(type(instance)),
+    ]
+    page_cache.purge(keys)
+    page_cache.purge_frontend_cache(keys)
+
+
+def register_signal_handlers():
+    page_published.connect(page_tree_changed_handler)
+    page_unpublished.connect(page_tree_changed_handler)
+    post_page_move.connect(page_tree_changed_handler)
+    post_delete.connect(page_tree_changed_handler, sender=Page)
+
+    published.connect(footer_text_changed_handler, sender=FooterText)
+    unpublished.connect(footer_text_changed_handler, sender=FooterText)
+    post_delete.connect(footer_text_changed_handler, sender=FooterText)
+
+    page_published.connect(search_index_changed_handler)
+    page_unpublished.connect(search_index_changed_handler)
+    post_delete.connect(search_index_changed_handler, sender=Page)
+    published.connect(search_index_changed_handler, sender=Person)
+    unpublished.connect(search_index_changed_handler, sender=Person)
+    post_delete.connect(search_index_changed_handler, sender=Person)
+
+    page_published.connect(api_responses_changed_handler)
+    page_unpublished.connect(api_responses_changed_handler)
+    post_page_move.connect(api_responses_changed_handler)
+    post_delete.connect(api_responses_changed_handler, sender=Page)
+    for model in (get_image_model(), get_document_model()):
+        post_save.connect(api_responses_changed_handler, sender=model)
+        post_delete.connect(api_responses_changed_handler, sender=model)
+
+    post_init.connect(page_cache.post_init_handler)
+    page_published.connect(page_cache_page_changed_handler)
+    page_unpublished.connect(page_cache_page_changed_handler)
+    post_page_move.connect(page_cache_page_changed_handler)
+    post_delete.connect(page_cache_page_changed_handler, sender=Page)
+    for model in (BreadIngredient, FooterText, Person):
+        published.connect(page_cache_object_changed_handler, sender=model)
+        unpublished.connect(page_cache_object_changed_handler, sender=model)
+        post_delete.connect(page_cache_object_changed_handler, sender=model)
+    for model in (
+        BreadType,
+        Country,
+        GenericSettings,
+        SiteSettings,
+        get_image_model(),
+    ):
+        post_save.connect(page_cache_object_changed_handler, sender=model)
+        post_delete.connect(page_cache_object_changed_handler, sender=model)
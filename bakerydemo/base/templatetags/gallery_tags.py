@@ -1,15 +1,42 @@
 from django import template
 from wagtail.images.models import Image
 
+from bakerydemo.base import page_cache
+from bakerydemo.base.listings import prefetch_renditions
+from bakerydemo.base.pagination import InvalidCursor, KeysetPaginator
+
 register = template.Library()
 
+# The query string parameter holding the cursor of the page of images to show
+GALLERY_CURSOR_PARAM = "images"
+GALLERY_PAGE_SIZE = 24
+GALLERY_IMAGE_FILTERS = ["format-{avif,webp,jpeg} fill-{300x200-c75,645x480-c75}"]
+
 
-# Retrieves a single gallery item and returns a gallery of images
+# Retrieves a single gallery item and returns a page of images from it, newest
+# first, with "load more" links to page through the rest of the collection
 @register.inclusion_tag("tags/gallery.html", takes_context=True)
 def gallery(context, gallery):
-    images = Image.objects.filter(collection=gallery)
+    request = context["request"]
+    paginator = KeysetPaginator(
+        prefetch_renditions(
+            Image.objects.filter(collection=gallery),
+            *GALLERY_IMAGE_FILTERS,
+            image_field=None,
+        ),
+        GALLERY_PAGE_SIZE,
+        ordering=("-created_at", "-id"),
+    )
+    try:
+        images = paginator.page(request.GET.get(GALLERY_CURSOR_PARAM))
+    except InvalidCursor:
+        images = paginator.page()
+
+    # Newly added images may appear on any page of the gallery
+    page_cache.record_dependency(page_cache.get_model_surrogate_key(Image))
 
     return {
         "images": images,
-        "request": context["request"],
+        "cursor_param": GALLERY_CURSOR_PARAM,
+        "request": request,
     }
@@ -1,11 +1,29 @@
 from django import template
+from django.core.cache import cache
+from django.utils import translation
+from django.utils.safestring import mark_safe
+from wagtail.coreutils import get_supported_content_language_variant
 from wagtail.models import Page, Site
-
+from wagtail.templatetags.wagtailcore_tags import richtext
+
+from bakerydemo.base import page_cache
+from bakerydemo.base.cache import (
+    FOOTER_TEXT,
+    PAGE_TREE,
+    LRUCache,
+    get_generation,
+    make_key,
+)
 from bakerydemo.base.models import FooterText
 
 register = template.Library()
 # https://docs.djangoproject.com/en/3.2/howto/custom-template-tags/
 
+MENU_CACHE_TIMEOUT = 60 * 60 * 24
+FOOTER_CACHE_TIMEOUT = 60 * 60 * 24
+
+_breadcrumbs_cache = LRUCache(maxsize=2048)
+
 
 @register.simple_tag(takes_context=True)
 def get_site_root(context):
@@ -25,27 +43,97 @@ def is_active(page, current_page):
     return current_page.url_path.startswith(page.url_path) if current_page else False
 
 
+def get_menu_items(parent, request):
+    # The menu is rendered on every page, so the live menu children of the
+    # parent are cached per site and locale until the page tree changes.
+    # Only plain values are cached, with the URL resolved for the site.
+    site = Site.find_for_request(request)
+    key = make_key(
+        "menu-items",
+        site.pk if site else None,
+        parent.locale_id,
+        parent.pk,
+        namespace=PAGE_TREE,
+    )
+    menuitems = cache.get(key)
+    if menuitems is None:
+        menuitems = [
+            {
+                "pk": menuitem.pk,
+                "title": menuitem.title,
+                "url": menuitem.get_url(request),
+                "url_path": menuitem.url_path,
+            }
+            for menuitem in parent.get_children().live().in_menu()
+        ]
+        cache.set(key, menuitems, MENU_CACHE_TIMEOUT)
+
+    page_cache.record_dependency(
+        page_cache.get_children_surrogate_key(parent),
+        *(page_cache.get_page_surrogate_key(item["pk"]) for item in menuitems),
+    )
+    return menuitems
+
+
 # Retrieves the top menu items - the immediate children of the parent page
 @register.inclusion_tag("tags/top_menu.html", takes_context=True)
 def top_menu(context, parent, calling_page=None):
-    menuitems = parent.get_children().live().in_menu()
-    for menuitem in menuitems:
+    menuitems = [
+        # Copy the cached item, as the active state is specific to this request.
         # We don't directly check if calling_page is None since the template
         # engine can pass an empty string to calling_page
         # if the variable passed as calling_page does not exist.
-        menuitem.active = (
-            calling_page.url_path.startswith(menuitem.url_path)
-            if calling_page
-            else False
+        dict(
+            menuitem,
+            active=(
+                calling_page.url_path.startswith(menuitem["url_path"])
+                if calling_page
+                else False
+            ),
         )
+        for menuitem in get_menu_items(parent, context["request"])
+    ]
     return {
         "calling_page": calling_page,
         "menuitems": menuitems,
-        # required by the pageurl tag that we want to use within this template
         "request": context["request"],
     }
 
 
+def get_breadcrumbs(page, request):
+    # Treebeard stores the ancestry of each page in its materialised path,
+    # using `steplen` characters per level, so the paths of the ancestors are
+    # prefixes of the page's own path. Their titles and URLs are kept in an
+    # in-process cache keyed by path, which is refilled for each generation
+    # of the page tree, so most requests don't need to query for them.
+    site = Site.find_for_request(request)
+    generation = get_generation(PAGE_TREE)
+    keys = [
+        (generation, site.pk if site else None, page.path[: depth * Page.steplen])
+        for depth in range(2, page.depth + 1)
+    ]
+    breadcrumbs = _breadcrumbs_cache.get_many(keys)
+
+    missing = {key[2]: key for key in keys if key not in breadcrumbs}
+    if missing:
+        fetched = {
+            missing[ancestor.path]: {
+                "pk": ancestor.pk,
+                "title": ancestor.title,
+                "url": ancestor.get_url(request),
+            }
+            for ancestor in Page.objects.filter(path__in=missing)
+        }
+        _breadcrumbs_cache.set_many(fetched)
+        breadcrumbs.update(fetched)
+
+    ancestors = [breadcrumbs[key] for key in keys if key in breadcrumbs]
+    page_cache.record_dependency(
+        *(page_cache.get_page_surrogate_key(ancestor["pk"]) for ancestor in ancestors)
+    )
+    return ancestors
+
+
 @register.inclusion_tag("tags/breadcrumbs.html", takes_context=True)
 def breadcrumbs(context):
     self = context.get("self")
@@ -53,25 +141,53 @@ def breadcrumbs(context):
         # When on the home page, displaying breadcrumbs is irrelevant.
         ancestors = ()
     else:
-        ancestors = Page.objects.ancestor_of(self, inclusive=True).filter(depth__gt=1)
+        ancestors = get_breadcrumbs(self, context["request"])
     return {
         "ancestors": ancestors,
         "request": context["request"],
     }
 
 
+def get_live_footer_html(language_code):
+    # The footer is rendered on every page, so the HTML of the live footer
+    # text is cached per locale. The generation is replaced whenever a footer
+    # text is published or unpublished, so the cached HTML always belongs to
+    # the live revision.
+    key = make_key("footer-text", language_code, namespace=FOOTER_TEXT)
+    footer_html = cache.get(key)
+    if footer_html is None:
+        live_footer_texts = FooterText.objects.filter(live=True)
+        instance = (
+            live_footer_texts.filter(locale__language_code=language_code).first()
+            or live_footer_texts.first()
+        )
+        footer_html = str(richtext(instance.body)) if instance else ""
+        cache.set(key, footer_html, FOOTER_CACHE_TIMEOUT)
+
+    page_cache.record_dependency(page_cache.get_model_surrogate_key(FooterText))
+    return mark_safe(footer_html)
+
+
 @register.inclusion_tag("base/include/footer_text.html", takes_context=True)
 def get_footer_text(context):
     # Get the footer text from the context if exists,
     # so that it's possible to pass a custom instance e.g. for previews
-    # or page types that need a custom footer
+    # or page types that need a custom footer. These are never cached.
     footer_text = context.get("footer_text", "")
-
-    # If the context doesn't have footer_text defined, get one that's live
-    if not footer_text:
-        instance = FooterText.objects.filter(live=True).first()
-        footer_text = instance.body if instance else ""
+    if footer_text:
+        return {
+            "footer_html": richtext(footer_text),
+        }
+
+    # Otherwise use the live one, remembering it for the rest of the request
+    request = context.get("request")
+    language_code = get_supported_content_language_variant(translation.get_language())
+    footer_html_by_language = getattr(request, "_footer_html_by_language", {})
+    if language_code not in footer_html_by_language:
+        footer_html_by_language[language_code] = get_live_footer_html(language_code)
+        if request is not None:
+            request._footer_html_by_language = footer_html_by_language
 
     return {
-        "footer_text": footer_text,
+        "footer_html": footer_html_by_language[language_code],
     }
@@ -0,0 +1,220 @@
+import os
+import shutil
+import sys
+import tempfile
+import types
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from wagtail.models import Site
+
+from bakerydemo.base.management.commands import load_initial_data, reset_demo
+from bakerydemo.base.models import GenericSettings, SiteSettings, StandardPage
+from bakerydemo.base.page_cache import PageCacheBackend
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=600)
+class PageCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        site = Site.objects.get(is_default_site=True)
+        # Settings are created on first use, which would purge the page cache
+        # while the first page is rendered
+        GenericSettings.load()
+        SiteSettings.for_site(site)
+        home = site.root_page
+        cls.page = home.add_child(instance=StandardPage(title="About", slug="about"))
+        cls.page.save_revision().publish()
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def get_page(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.page.url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_serves_cached_page_without_queries(self):
+        self.get_page()
+        response, query_count = self.get_page()
+
+        self.assertEqual(query_count, 0)
+        self.assertContains(response, "About")
+
+    def test_backend_purge_rerenders_page(self):
+        self.get_page()
+
+        PageCacheBackend({}).purge(f"http://testserver{self.page.url}")
+
+        response, query_count = self.get_page()
+        self.assertGreater(query_count, 0)
+
+    def test_publishing_rerenders_page(self):
+        self.get_page()
+
+        self.page.title = "About us"
+        self.page.save_revision().publish()
+
+        response, query_count = self.get_page()
+        self.assertGreater(query_count, 0)
+        self.assertContains(response, "About us")
+
+
+class ResetDemoSnapshotTest(TestCase):
+    def setUp(self):
+        self.snapshot_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.snapshot_dir)
+        self.enterContext(override_settings(RESET_DEMO_SNAPSHOT_DIR=self.snapshot_dir))
+
+        # A single migration and fixture, whose contents are the fingerprint
+        self.migration_file = self.write_file("0001_initial.py", "operations = []")
+        self.fixture_file = self.write_file("bakerydemo.json", "[]")
+        module = types.ModuleType("bakerydemo_test_migration")
+        module.__file__ = self.migration_file
+        migration = types.SimpleNamespace(__module__=module.__name__)
+        loader = mock.Mock(disk_migrations={("base", "0001_initial"): migration})
+        self.enterContext(mock.patch.dict(sys.modules, {module.__name__: module}))
+        self.enterContext(
+            mock.patch.object(reset_demo, "MigrationLoader", return_value=loader)
+        )
+        self.enterContext(
+            mock.patch.object(reset_demo, "FIXTURE_FILE", self.fixture_file)
+        )
+
+        # Nothing is actually reset, dumped or restored
+        self.enterContext(
+            mock.patch.object(
+                reset_demo,
+                "POSTGRESQL_ENGINES",
+                [settings.DATABASES[DEFAULT_DB_ALIAS]["ENGINE"]],
+            )
+        )
+        self.call_command = self.enterContext(
+            mock.patch.object(reset_demo, "call_command")
+        )
+        self.run_postgres_command = self.enterContext(
+            mock.patch.object(
+                reset_demo.Command,
+                "run_postgres_command",
+                side_effect=self.fake_postgres_command,
+            )
+        )
+
+    def write_file(self, name, contents):
+        path = os.path.join(tempfile.mkdtemp(), name)
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, "w") as f:
+            f.write(contents)
+        return path
+
+    def fake_postgres_command(self, args):
+        if args[0] == "pg_dump":
+            with open(args[-1].removeprefix("--file="), "w") as f:
+                f.write("dump")
+
+    def get_snapshot_path(self):
+        return reset_demo.Command().get_snapshot_path()
+
+    def reset(self):
+        command = reset_demo.Command(stdout=mock.Mock())
+        command.handle(snapshot=True)
+        return [call.args[0] for call in self.call_command.call_args_list]
+
+    def test_fingerprint_changes_with_migrations_and_fixture(self):
+        snapshot_path = self.get_snapshot_path()
+        self.assertEqual(os.path.dirname(snapshot_path), self.snapshot_dir)
+        self.assertEqual(self.get_snapshot_path(), snapshot_path)
+
+        with open(self.migration_file, "a") as f:
+            f.write("\n# Changed")
+        migration_changed_path = self.get_snapshot_path()
+        self.assertNotEqual(migration_changed_path, snapshot_path)
+
+        with open(self.fixture_file, "w") as f:
+            f.write("[{}]")
+        self.assertNotIn(
+            self.get_snapshot_path(), [snapshot_path, migration_changed_path]
+        )
+
+    def test_creates_snapshot_after_full_reset(self):
+        commands = self.reset()
+
+        self.assertIn("migrate", commands)
+        self.assertIn("load_initial_data", commands)
+        self.assertTrue(os.path.exists(self.get_snapshot_path()))
+
+    def test_restores_snapshot_instead_of_migrating(self):
+        self.reset()
+        self.call_command.reset_mock()
+        self.run_postgres_command.reset_mock()
+
+        commands = self.reset()
+
+        self.assertNotIn("migrate", commands)
+        self.call_command.assert_any_call("load_initial_data", media_only=True)
+        [restore_args] = self.run_postgres_command.call_args.args
+        self.assertEqual(restore_args[0], "pg_restore")
+        self.assertEqual(restore_args[-1], self.get_snapshot_path())
+
+    def test_replaces_snapshot_when_fingerprint_changes(self):
+        self.reset()
+        stale_snapshot_path = self.get_snapshot_path()
+        with open(self.fixture_file, "w") as f:
+            f.write("[{}]")
+
+        commands = self.reset()
+
+        self.assertIn("migrate", commands)
+        self.assertEqual(
+            os.listdir(self.snapshot_dir),
+            [os.path.basename(self.get_snapshot_path())],
+        )
+        self.assertFalse(os.path.exists(stale_snapshot_path))
+
+
+class LoadInitialDataManifestTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+        local_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, local_root)
+        self.local_storage = FileSystemStorage(local_root)
+        self.local_storage.save("original_images/loaf.jpg", ContentFile(b"loaf"))
+
+        self.manifest_path = os.path.join(local_root, "manifest.json")
+        self.enterContext(
+            mock.patch.object(load_initial_data, "MANIFEST_PATH", self.manifest_path)
+        )
+
+    def copy_files(self):
+        command = load_initial_data.Command()
+        with mock.patch("builtins.print"):
+            command._copy_files(self.local_storage, workers=1)
+        return command
+
+    def test_manifest_is_kept_out_of_storage(self):
+        self.copy_files()
+
+        self.assertEqual(default_storage.listdir("")[1], [])
+        self.assertTrue(default_storage.exists("original_images/loaf.jpg"))
+        self.assertEqual(
+            list(load_initial_data.Command()._load_manifest()),
+            ["original_images/loaf.jpg"],
+        )
+
+    def test_files_in_manifest_are_not_read_back(self):
+        self.copy_files()
+
+        with mock.patch.object(default_storage, "open") as open_stored_file:
+            self.copy_files()
+        open_stored_file.assert_not_called()
@@ -4,6 +4,7 @@ from wagtail.admin.userbar import AccessibilityItem
 from wagtail.snippets.models import register_snippet
 from wagtail.snippets.views.snippets import SnippetViewSet, SnippetViewSetGroup
 
+from bakerydemo.base import page_cache
 from bakerydemo.base.filters import RevisionFilterSetMixin
 from bakerydemo.base.models import FooterText, Person
 
@@ -44,6 +45,14 @@ def replace_userbar_accessibility_item(request, items):
     ]
 
 
+@hooks.register("before_serve_page")
+def record_page_cache_dependencies(page, request, serve_args, serve_kwargs):
+    # Index pages, and routable pages such as the blog tag archive, list
+    # their children, so the response for any page may change when one of
+    # its children is published, unpublished or moved
+    page_cache.record_dependency(page_cache.get_children_surrogate_key(page))
+
+
 class PersonFilterSet(RevisionFilterSetMixin, WagtailFilterSet):
     class Meta:
         model = Person
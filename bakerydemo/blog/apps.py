@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class BlogAppConfig(AppConfig):
+    name = "bakerydemo.blog"
+
+    def ready(self):
+        from bakerydemo.blog.signal_handlers import register_signal_handlers
+
+        register_signal_handlers()
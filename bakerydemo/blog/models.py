@@ -1,7 +1,10 @@
 from __future__ import unicode_literals
 
 from django.contrib import messages
+from django.core.cache import cache
 from django.db import models
+from django.db.models import Count
+from django.db.models.functions import Lower
 from django.shortcuts import redirect, render
 from modelcluster.contrib.taggit import ClusterTaggableManager
 from modelcluster.fields import ParentalKey
@@ -12,7 +15,17 @@ from wagtail.fields import StreamField
 from wagtail.models import Orderable, Page
 from wagtail.search import index
 
+from bakerydemo.base import page_cache
 from bakerydemo.base.blocks import BaseStreamBlock
+from bakerydemo.base.cache import PAGE_TREE, make_key
+from bakerydemo.base.listings import (
+    PaginatedListingMixin,
+    get_card_queryset,
+    order_by_date_published,
+    prefetch_authors,
+)
+
+CHILD_TAGS_CACHE_TIMEOUT = 60 * 60 * 24
 
 
 class BlogPersonRelationship(Orderable, models.Model):
@@ -99,13 +112,15 @@ class BlogPage(Page):
         with a loop on the template. If we tried to access the blog_person_
         relationship directly we'd print `blog.BlogPersonRelationship.None`
         """
-        # Only return authors that are not in draft
-        return [
-            n.person
-            for n in self.blog_person_relationship.filter(
+        # Use the authors prefetched for a listing, if there are any (see
+        # `bakerydemo.base.listings.prefetch_authors`)
+        relationships = getattr(self, "_prefetched_authors", None)
+        if relationships is None:
+            # Only return authors that are not in draft
+            relationships = self.blog_person_relationship.filter(
                 person__live=True
-            ).select_related("person")
-        ]
+            ).select_related("person__image")
+        return [n.person for n in relationships]
 
     @property
     def get_tags(self):
@@ -128,7 +143,7 @@ class BlogPage(Page):
     subpage_types = []
 
 
-class BlogIndexPage(RoutablePageMixin, Page):
+class BlogIndexPage(PaginatedListingMixin, RoutablePageMixin, Page):
     """
     Index page for blogs.
     We need to alter the page model's context to return the child page objects,
@@ -156,21 +171,41 @@ class BlogIndexPage(RoutablePageMixin, Page):
     # Specifies that only BlogPage objects can live under this index page
     subpage_types = ["BlogPage"]
 
+    # The renditions rendered by includes/card/blog-listing-card.html, which
+    # are prefetched for the listed posts
+    listing_image_filters = ["format-{avif,webp,jpeg} fill-322x247-c100"]
+
+    # Posts are listed a page at a time, newest first (see
+    # PaginatedListingMixin)
+    listing_context_name = "posts"
+    listing_cards_template = "blog/blog_cards.html"
+    listing_ordering = ("-listing_date", "-id")
+
     # Defines a method to access the children of the page (e.g. BlogPage
     # objects). On the demo site we use this on the HomePage
     def children(self):
+        page_cache.record_dependency(page_cache.get_children_surrogate_key(self))
         return self.get_children().specific().live()
 
-    # Overrides the context to list all child items, that are live, by the
+    # Overrides the context to list the child items, that are live, by the
     # date that they were published
     # https://docs.wagtail.org/en/stable/getting_started/tutorial.html#overriding-context
     def get_context(self, request):
         context = super(BlogIndexPage, self).get_context(request)
-        context["posts"] = (
-            BlogPage.objects.descendant_of(self).live().order_by("-date_published")
-        )
+        context.update(self.get_listing_context(request, self.get_listing_posts()))
         return context
 
+    # Returns the posts to list, optionally with a given tag, trimmed to what
+    # the cards show and with their authors prefetched
+    def get_listing_posts(self, tag=None):
+        return prefetch_authors(
+            get_card_queryset(
+                order_by_date_published(self.get_posts(tag=tag)),
+                *self.listing_image_filters,
+            ),
+            "blog_person_relationship",
+        )
+
     # This defines a Custom view that utilizes Tags. This view will return all
     # related BlogPages for a given Tag or redirect back to the BlogIndexPage.
     # More information on RoutablePages is at
@@ -187,9 +222,12 @@ class BlogIndexPage(RoutablePageMixin, Page):
                 messages.add_message(request, messages.INFO, msg)
             return redirect(self.url)
 
-        posts = self.get_posts(tag=tag)
-        context = {"self": self, "tag": tag, "posts": posts}
-        return render(request, "blog/blog_index_page.html", context)
+        context = {
+            "self": self,
+            "tag": tag,
+            **self.get_listing_context(request, self.get_listing_posts(tag=tag)),
+        }
+        return render(request, self.get_template(request), context)
 
     def serve_preview(self, request, mode_name):
         # Needed for previews to work
@@ -203,11 +241,31 @@ class BlogIndexPage(RoutablePageMixin, Page):
             posts = posts.filter(tags=tag)
         return posts
 
-    # Returns the list of Tags for all child posts of this BlogPage.
+    # Returns a summary of the tags used by live child posts of this
+    # BlogIndexPage: each tag's slug, name, tag archive URL and number of
+    # posts, sorted by name. The tags and counts are fetched with a single
+    # aggregate query and cached with the page tree, until any page is
+    # published, unpublished, moved or deleted, or a tag is renamed or deleted
+    # (see base/signal_handlers.py and blog/signal_handlers.py).
     def get_child_tags(self):
-        tags = []
-        for post in self.get_posts():
-            # Not tags.append() because we don't want a list of lists
-            tags += post.get_tags
-        tags = sorted(set(tags))
-        return tags
+        cache_key = make_key("blog-child-tags", self.pk, namespace=PAGE_TREE)
+        tags = cache.get(cache_key)
+        if tags is None:
+            tags = list(
+                BlogPageTag.objects.filter(content_object__in=self.get_posts())
+                .values("tag__slug", "tag__name")
+                .annotate(post_count=Count("content_object", distinct=True))
+                .order_by(Lower("tag__name"))
+            )
+            cache.set(cache_key, tags, CHILD_TAGS_CACHE_TIMEOUT)
+
+        base_url = self.url
+        return [
+            {
+                "slug": tag["tag__slug"],
+                "name": tag["tag__name"],
+                "url": f"{base_url}tags/{tag['tag__slug']}/",
+                "post_count": tag["post_count"],
+            }
+            for tag in tags
+        ]
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from taggit.models import Tag
+
+from bakerydemo.base.cache import PAGE_TREE, bump_generation
+
+
+def tag_changed_handler(created=False, **kwargs):
+    # The tag summaries of blog index pages are cached with the page tree, and
+    # show the names of the tags. A new tag isn't on any live post yet.
+    if not created:
+        bump_generation(PAGE_TREE)
+
+
+def register_signal_handlers():
+    post_save.connect(tag_changed_handler, sender=Tag)
+    post_delete.connect(tag_changed_handler, sender=Tag)
@@ -0,0 +1,134 @@
+import base64
+import datetime
+import json
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from taggit.models import Tag
+from wagtail.models import Page
+
+from bakerydemo.blog.models import BlogIndexPage, BlogPage
+
+
+def make_cursor(data):
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+
+MALFORMED_CURSORS = [
+    "not a cursor",
+    make_cursor(["n", [None, None]]),
+    make_cursor(["n", ["2020-01-01", "x"]]),
+    make_cursor(["n", ["not a date", 1]]),
+    make_cursor(["p", [[], {}]]),
+]
+
+
+class BlogIndexPageListingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        root = Page.get_first_root_node()
+        cls.index = root.add_child(
+            instance=BlogIndexPage(title="Blog", slug="test-blog")
+        )
+        cls.tag = Tag.objects.create(name="Baking", slug="baking")
+        for number in range(3):
+            post = cls.index.add_child(
+                instance=BlogPage(
+                    title=f"Post {number}",
+                    slug=f"post-{number}",
+                    # One post has no date, and is listed last
+                    date_published=(
+                        datetime.date(2020, 1, number + 1) if number else None
+                    ),
+                )
+            )
+            post.tags.add(cls.tag)
+            post.save_revision().publish()
+
+    def get_listing(self, tag=None, **params):
+        request = RequestFactory().get("/", params)
+        return self.index.get_listing_context(
+            request, self.index.get_listing_posts(tag=tag)
+        )["posts"]
+
+    def test_pages_through_posts(self):
+        self.index.listing_per_page = 2
+        first_page = self.get_listing()
+        second_page = self.get_listing(page=first_page.next_page_number())
+
+        self.assertEqual(
+            [post.title for post in [*first_page, *second_page]],
+            ["Post 2", "Post 1", "Post 0"],
+        )
+        self.assertFalse(second_page.has_next())
+
+    def test_malformed_cursor_shows_first_page(self):
+        first_page = [post.pk for post in self.get_listing()]
+
+        for cursor in MALFORMED_CURSORS:
+            for tag in (None, self.tag):
+                with self.subTest(cursor=cursor, tag=tag):
+                    listing = self.get_listing(tag=tag, page=cursor, fragment="")
+                    self.assertEqual([post.pk for post in listing], first_page)
+
+    def test_fragment_template(self):
+        request = RequestFactory().get("/", {"fragment": ""})
+        self.assertEqual(
+            self.index.get_template(request), "includes/listing-fragment.html"
+        )
+
+
+class BlogIndexPageChildTagsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        root = Page.get_first_root_node()
+        cls.index = root.add_child(
+            instance=BlogIndexPage(title="Blog", slug="test-blog")
+        )
+        cls.other_index = root.add_child(
+            instance=BlogIndexPage(title="Other blog", slug="test-other-blog")
+        )
+        cls.tag = Tag.objects.create(name="Baking", slug="baking")
+        cls.posts = []
+        for number in range(2):
+            post = cls.index.add_child(
+                instance=BlogPage(title=f"Post {number}", slug=f"post-{number}")
+            )
+            post.tags.add(cls.tag)
+            post.save_revision().publish()
+            cls.posts.append(post)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def get_child_tags(self):
+        return [
+            (tag["name"], tag["post_count"])
+            for tag in BlogIndexPage.objects.get(pk=self.index.pk).get_child_tags()
+        ]
+
+    def test_summary_is_cached(self):
+        self.assertEqual(self.get_child_tags(), [("Baking", 2)])
+        BlogPage.objects.filter(pk=self.posts[0].pk).update(live=False)
+
+        self.assertEqual(self.get_child_tags(), [("Baking", 2)])
+
+    def test_moving_a_post_updates_the_summary(self):
+        self.assertEqual(self.get_child_tags(), [("Baking", 2)])
+        self.posts[0].move(self.other_index, pos="last-child")
+
+        self.assertEqual(self.get_child_tags(), [("Baking", 1)])
+
+    def test_renaming_a_tag_updates_the_summary(self):
+        self.assertEqual(self.get_child_tags(), [("Baking", 2)])
+        self.tag.name = "Bread"
+        self.tag.save()
+
+        self.assertEqual(self.get_child_tags(), [("Bread", 2)])
+
+    def test_deleting_a_tag_updates_the_summary(self):
+        self.assertEqual(self.get_child_tags(), [("Baking", 2)])
+        self.tag.delete()
+
+        self.assertEqual(self.get_child_tags(), [])
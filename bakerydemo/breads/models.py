@@ -1,6 +1,5 @@
 from django import forms
 from django.contrib.contenttypes.fields import GenericRelation
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.db import models
 from modelcluster.fields import ParentalManyToManyField
 from wagtail.admin.panels import FieldPanel, MultiFieldPanel
@@ -8,7 +7,10 @@ from wagtail.fields import StreamField
 from wagtail.models import DraftStateMixin, Page, RevisionMixin
 from wagtail.search import index
 
+from bakerydemo.base import page_cache
 from bakerydemo.base.blocks import BaseStreamBlock
+from bakerydemo.base.listings import get_card_queryset
+from bakerydemo.base.pagination import InvalidCursor, KeysetPaginator
 
 
 class Country(models.Model):
@@ -157,6 +159,10 @@ class BreadPage(Page):
         index.SearchField("body"),
     ]
 
+    # Shown by includes/card/listing-card.html, so selected along with the
+    # page wherever it's listed (see `get_specific_pages`)
+    listing_select_related = ["origin", "bread_type"]
+
     parent_page_types = ["BreadsIndexPage"]
 
 
@@ -187,31 +193,51 @@ class BreadsIndexPage(Page):
     # Can only have BreadPage children
     subpage_types = ["BreadPage"]
 
+    # The renditions rendered by includes/card/listing-card.html, which are
+    # prefetched for each page of results
+    listing_image_filters = ["format-{avif,webp,jpeg} fill-180x180-c100"]
+
     # Returns a queryset of BreadPage objects that are live, that are direct
-    # descendants of this index page with most recent first
+    # descendants of this index page with most recent first. Publishing sets
+    # first_published_at, but pages imported live without it are left out, as
+    # the cursor pagination below can't page past a null.
     def get_breads(self):
-        return (
-            BreadPage.objects.live().descendant_of(self).order_by("-first_published_at")
+        return get_card_queryset(
+            BreadPage.objects.live()
+            .descendant_of(self)
+            .filter(first_published_at__isnull=False)
+            .order_by("-first_published_at"),
+            *self.listing_image_filters,
         )
 
     # Allows child objects (e.g. BreadPage objects) to be accessible via the
     # template. We use this on the HomePage to display child items of featured
     # content
     def children(self):
+        page_cache.record_dependency(page_cache.get_children_surrogate_key(self))
         return self.get_children().specific().live()
 
-    # Pagination for the index page. We use the `django.core.paginator` as any
-    # standard Django app would, but the difference here being we have it as a
-    # method on the model rather than within a view function
+    # Pagination for the index page. Rather than numbered pages, which need a
+    # COUNT of all the breads and an OFFSET query that gets slower the deeper
+    # the page, each page starts after the last bread of the previous one, as
+    # given by the opaque cursor in the `page` parameter. Links to numbered
+    # pages from before this, or any other invalid cursor, show the first page.
+    # The total is counted up to `breads_count_limit`, and shown as an estimate
+    # beyond that.
+    breads_per_page = 12
+    breads_count_limit = 1000
+
     def paginate(self, request, *args):
-        page = request.GET.get("page")
-        paginator = Paginator(self.get_breads(), 12)
+        paginator = KeysetPaginator(
+            self.get_breads(),
+            self.breads_per_page,
+            ordering=("-first_published_at", "-id"),
+            count_limit=self.breads_count_limit,
+        )
         try:
-            pages = paginator.page(page)
-        except PageNotAnInteger:
-            pages = paginator.page(1)
-        except EmptyPage:
-            pages = paginator.page(paginator.num_pages)
+            pages = paginator.page(request.GET.get("page"))
+        except InvalidCursor:
+            pages = paginator.page()
         return pages
 
     # Returns the above to the get_context method that is used to populate the
@@ -0,0 +1,69 @@
+import base64
+import json
+
+from django.test import RequestFactory, TestCase
+from wagtail.models import Page
+
+from bakerydemo.breads.models import BreadPage, BreadsIndexPage
+
+
+def make_cursor(data):
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+
+class BreadsIndexPagePaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        root = Page.get_first_root_node()
+        cls.index = root.add_child(
+            instance=BreadsIndexPage(title="Breads", slug="test-breads")
+        )
+        for number in range(3):
+            bread = cls.index.add_child(
+                instance=BreadPage(title=f"Bread {number}", slug=f"bread-{number}")
+            )
+            bread.save_revision().publish()
+
+    def paginate(self, cursor):
+        request = RequestFactory().get("/", {"page": cursor})
+        return self.index.paginate(request)
+
+    def test_pages_through_breads(self):
+        self.index.breads_per_page = 2
+        first_page = self.paginate("")
+        second_page = self.paginate(first_page.next_page_number())
+
+        self.assertEqual(len(first_page), 2)
+        self.assertEqual(len(second_page), 1)
+        self.assertFalse(second_page.has_next())
+
+    def test_leaves_out_breads_never_published(self):
+        imported = self.index.add_child(
+            instance=BreadPage(title="Imported", slug="imported", live=True)
+        )
+        BreadPage.objects.filter(pk=imported.pk).update(first_published_at=None)
+        self.index.breads_per_page = 2
+
+        first_page = self.paginate("")
+        second_page = self.paginate(first_page.next_page_number())
+        breads = [bread.pk for bread in [*first_page, *second_page]]
+
+        self.assertEqual(len(breads), 3)
+        self.assertNotIn(imported.pk, breads)
+        self.assertFalse(second_page.has_next())
+
+    def test_malformed_cursor_shows_first_page(self):
+        first_page = [bread.pk for bread in self.paginate("")]
+
+        for cursor in [
+            "not a cursor",
+            make_cursor(["n", [None, None]]),
+            make_cursor(["n", ["2020-01-01", "x"]]),
+            make_cursor(["n", ["not a date", 1]]),
+            make_cursor(["n", ["2020-01-01T00:00:00+00:00", 10**30]]),
+            make_cursor(["x", ["2020-01-01T00:00:00+00:00", 1]]),
+        ]:
+            with self.subTest(cursor=cursor):
+                self.assertEqual(
+                    [bread.pk for bread in self.paginate(cursor)], first_page
+                )
@@ -0,0 +1,175 @@
+"""
+Finding the locations nearest to a point.
+
+The coordinates of every live location are held in memory in a k-d tree over
+points on the unit sphere, where straight line distance orders locations the
+same way as great circle distance, so the nearest locations are found in
+logarithmic time without a GIS extension. Each process builds the tree when
+it's first needed, and again whenever a location is published, unpublished,
+moved or deleted.
+"""
+
+import heapq
+import math
+import re
+import threading
+from dataclasses import dataclass
+
+from wagtail.models import Page
+
+from bakerydemo.base import page_cache
+from bakerydemo.base.cache import LOCATIONS, get_generation
+
+EARTH_RADIUS_KM = 6371.0088
+
+LAT_LONG_RE = re.compile(r"^\s*(-?\d+(?:\.\d+)?),\s*(-?\d+(?:\.\d+)?)\s*$")
+
+
+def parse_lat_long(lat_long):
+    """
+    Returns the latitude and longitude in a "lat, long" string, or
+    (None, None) if it isn't valid.
+    """
+    match = LAT_LONG_RE.match(lat_long or "")
+    if not match:
+        return None, None
+    return float(match.group(1)), float(match.group(2))
+
+
+def to_unit_vector(latitude, longitude):
+    latitude, longitude = math.radians(latitude), math.radians(longitude)
+    return (
+        math.cos(latitude) * math.cos(longitude),
+        math.cos(latitude) * math.sin(longitude),
+        math.sin(latitude),
+    )
+
+
+def chord_to_km(chord):
+    return 2 * math.asin(min(chord / 2, 1.0)) * EARTH_RADIUS_KM
+
+
+@dataclass(frozen=True)
+class IndexedLocation:
+    pk: int
+    title: str
+    url: str
+    latitude: float
+    longitude: float
+
+
+class LocationIndex:
+    """
+    A k-d tree of locations, split on x, y and z in turn.
+    """
+
+    def __init__(self, locations, dependency_keys=()):
+        # The page cache surrogate keys of anything rendered from the index
+        # depends on (see `bakerydemo.base.page_cache`)
+        self.dependency_keys = tuple(dependency_keys)
+        self.root = self._build(
+            [
+                (to_unit_vector(location.latitude, location.longitude), location)
+                for location in locations
+            ],
+            0,
+        )
+
+    def _build(self, points, axis):
+        # Nodes are (point, location, axis, left, right) tuples
+        if not points:
+            return None
+        points.sort(key=lambda point: point[0][axis])
+        middle = len(points) // 2
+        next_axis = (axis + 1) % 3
+        return (
+            points[middle][0],
+            points[middle][1],
+            axis,
+            self._build(points[:middle], next_axis),
+            self._build(points[middle + 1 :], next_axis),
+        )
+
+    def nearest(self, latitude, longitude, count, exclude=()):
+        """
+        Returns up to `count` (location, distance in km) pairs, nearest
+        first, leaving out locations whose pk is in `exclude`.
+        """
+        target = to_unit_vector(latitude, longitude)
+        # A max-heap of the best matches so far, by negated squared distance
+        best = []
+
+        def visit(node):
+            if node is None:
+                return
+            point, location, axis, left, right = node
+            if location.pk not in exclude:
+                distance = sum((a - b) ** 2 for a, b in zip(point, target))
+                entry = (-distance, location.pk, location)
+                if len(best) < count:
+                    heapq.heappush(best, entry)
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, entry)
+
+            offset = target[axis] - point[axis]
+            near, far = (left, right) if offset < 0 else (right, left)
+            visit(near)
+            # Only look beyond the split if it's closer than the worst match
+            if len(best) < count or offset**2 < -best[0][0]:
+                visit(far)
+
+        if count > 0:
+            visit(self.root)
+        return [
+            (location, chord_to_km(math.sqrt(-distance)))
+            for distance, pk, location in sorted(best, reverse=True)
+        ]
+
+
+_index = None
+_index_generation = None
+_index_lock = threading.Lock()
+
+
+def build_location_index():
+    from bakerydemo.locations.models import LocationPage
+
+    locations = (
+        LocationPage.objects.live()
+        .filter(latitude__isnull=False, longitude__isnull=False)
+        .only("title", "url_path", "path", "latitude", "longitude")
+    )
+    parent_paths = {location.path[: -Page.steplen] for location in locations}
+    return LocationIndex(
+        [
+            IndexedLocation(
+                pk=location.pk,
+                title=location.title,
+                url=location.get_url(),
+                latitude=location.latitude,
+                longitude=location.longitude,
+            )
+            for location in locations
+        ],
+        # A location being published or unpublished changes the results
+        [
+            page_cache.get_children_surrogate_key(parent)
+            for parent in Page.objects.filter(path__in=parent_paths).only("pk")
+        ],
+    )
+
+
+def get_location_index():
+    """
+    Returns the index of live locations, building it first if this process
+    doesn't have one for the current generation of locations.
+    """
+    global _index, _index_generation
+
+    generation = get_generation(LOCATIONS)
+    if _index_generation != generation:
+        with _index_lock:
+            if _index_generation != generation:
+                _index = build_location_index()
+                _index_generation = generation
+    return _index
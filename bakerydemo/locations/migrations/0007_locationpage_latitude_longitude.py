@@ -0,0 +1,39 @@
+# Generated by Django 5.0.14 on 2026-10-17 14:59
+
+from django.db import migrations, models
+
+
+def populate_latitude_longitude(apps, schema_editor):
+    LocationPage = apps.get_model("locations", "LocationPage")
+    db_alias = schema_editor.connection.alias
+    for location in LocationPage.objects.using(db_alias).only("lat_long"):
+        try:
+            latitude, longitude = (
+                float(value) for value in location.lat_long.split(",")
+            )
+        except ValueError:
+            continue
+        LocationPage.objects.using(db_alias).filter(pk=location.pk).update(
+            latitude=latitude, longitude=longitude
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("locations", "0006_alter_locationoperatinghours_day"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="locationpage",
+            name="latitude",
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="locationpage",
+            name="longitude",
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.RunPython(populate_latitude_longitude, migrations.RunPython.noop),
+    ]
@@ -1,16 +1,26 @@
-from datetime import datetime
+from collections import defaultdict
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.validators import RegexValidator
 from django.db import models
+from django.utils import timezone
 from modelcluster.fields import ParentalKey
 from wagtail.admin.panels import FieldPanel, InlinePanel
 from wagtail.fields import StreamField
 from wagtail.models import Orderable, Page
 from wagtail.search import index
 
+from bakerydemo.base import page_cache
 from bakerydemo.base.blocks import BaseStreamBlock
+from bakerydemo.base.listings import PaginatedListingMixin, get_card_queryset
+from bakerydemo.locations import schedule
 from bakerydemo.locations.choices import DAY_CHOICES
+from bakerydemo.locations.geo import parse_lat_long
+
+# Schedules are rebuilt whenever a location is published, so this only
+# limits how long those of deleted locations are kept for
+SCHEDULE_CACHE_TIMEOUT = 60 * 60 * 24 * 7
 
 
 class OperatingHours(models.Model):
@@ -62,7 +72,7 @@ class LocationOperatingHours(Orderable, OperatingHours):
     )
 
 
-class LocationsIndexPage(Page):
+class LocationsIndexPage(PaginatedListingMixin, Page):
     """
     A Page model that creates an index page (a listview)
     """
@@ -80,20 +90,39 @@ class LocationsIndexPage(Page):
     # Only LocationPage objects can be added underneath this index page
     subpage_types = ["LocationPage"]
 
+    # The renditions rendered by includes/card/picture-card.html, which are
+    # prefetched for the listed locations
+    listing_image_filters = ["format-{avif,webp,jpeg} fill-{300x200-c75,645x480-c75}"]
+
+    # Locations are listed a page at a time, by title (see
+    # PaginatedListingMixin)
+    listing_context_name = "locations"
+    listing_cards_template = "locations/location_cards.html"
+    listing_ordering = ("title", "id")
+
     # Allows children of this indexpage to be accessible via the indexpage
     # object on templates. We use this on the homepage to show featured
     # sections of the site and their child pages
     def children(self):
+        page_cache.record_dependency(page_cache.get_children_surrogate_key(self))
         return self.get_children().specific().live()
 
-    # Overrides the context to list all child
+    # Overrides the context to list the child
     # items, that are live, by the title alphabetical order.
     # https://docs.wagtail.org/en/stable/getting_started/tutorial.html#overriding-context
     def get_context(self, request):
         context = super(LocationsIndexPage, self).get_context(request)
-        context["locations"] = (
-            LocationPage.objects.descendant_of(self).live().order_by("title")
+        context.update(
+            self.get_listing_context(
+                request,
+                get_card_queryset(
+                    LocationPage.objects.descendant_of(self).live(),
+                    *self.listing_image_filters,
+                ),
+            )
         )
+        # Each card shows whether the location is open now
+        LocationPage.prefetch_schedules(context["locations"].object_list)
         return context
 
     content_panels = Page.content_panels + [
@@ -132,6 +161,9 @@ class LocationPage(Page):
             ),
         ],
     )
+    # Parsed from lat_long whenever the page is saved
+    latitude = models.FloatField(null=True, editable=False)
+    longitude = models.FloatField(null=True, editable=False)
 
     # Search index configuration
     search_fields = Page.search_fields + [
@@ -153,32 +185,100 @@ class LocationPage(Page):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.latitude, self.longitude = parse_lat_long(self.lat_long)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "lat_long" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "latitude", "longitude"}
+        super().save(*args, **kwargs)
+
     @property
     def operating_hours(self):
         hours = self.hours_of_operation.all()
         return hours
 
-    # Determines if the location is currently open. It is timezone naive
-    def is_open(self):
-        now = datetime.now()
-        current_time = now.time()
-        current_day = now.strftime("%a").upper()
-        try:
-            self.operating_hours.get(
-                day=current_day,
-                opening_time__lte=current_time,
-                closing_time__gte=current_time,
+    def get_schedule_cache_key(self):
+        return f"bakerydemo:location-schedule:{self.pk}"
+
+    def compile_schedule(self):
+        """
+        Compiles the weekly schedule of the location from its operating hours,
+        and caches it until the location is next published.
+        """
+        self._schedule = schedule.compile_schedule(self.hours_of_operation.all())
+        cache.set(self.get_schedule_cache_key(), self._schedule, SCHEDULE_CACHE_TIMEOUT)
+        return self._schedule
+
+    @classmethod
+    def prefetch_schedules(cls, locations):
+        """
+        Fetches the schedules of the given locations from the cache, compiling
+        any that are missing from a single query of their operating hours, so
+        that `is_open` and `next_opening` don't query for any of them.
+        """
+        locations = [
+            location for location in locations if not hasattr(location, "_schedule")
+        ]
+        cached = cache.get_many(
+            [location.get_schedule_cache_key() for location in locations]
+        )
+        missing = {}
+        for location in locations:
+            try:
+                location._schedule = cached[location.get_schedule_cache_key()]
+            except KeyError:
+                missing[location.pk] = location
+        if not missing:
+            return
+
+        hours_by_location = defaultdict(list)
+        for hours in LocationOperatingHours.objects.filter(location__in=missing):
+            hours_by_location[hours.location_id].append(hours)
+        for location in missing.values():
+            location._schedule = schedule.compile_schedule(
+                hours_by_location[location.pk]
             )
-            return True
-        except LocationOperatingHours.DoesNotExist:
-            return False
+        cache.set_many(
+            {
+                location.get_schedule_cache_key(): location._schedule
+                for location in missing.values()
+            },
+            SCHEDULE_CACHE_TIMEOUT,
+        )
+
+    def get_schedule(self):
+        if not hasattr(self, "_schedule"):
+            LocationPage.prefetch_schedules([self])
+        return self._schedule
+
+    # Determines if the location is open at the given time, by default now, in
+    # the site's time zone
+    def is_open(self, at=None):
+        if at is None:
+            at = timezone.now()
+            self.record_status_expiry(at)
+        return schedule.is_open(self.get_schedule(), at)
+
+    # Returns when the location next opens, or None if it has no opening hours
+    def next_opening(self, at=None):
+        if at is None:
+            at = timezone.now()
+            self.record_status_expiry(at)
+        return schedule.get_next_opening(self.get_schedule(), at)
+
+    # Whether the location is open now, and when it next opens, change when it
+    # next opens or closes, so a cached page showing them must expire then
+    def record_status_expiry(self, now):
+        next_change = schedule.get_next_change(self.get_schedule(), now)
+        if next_change is not None:
+            page_cache.record_expiry(next_change)
 
     # Makes additional context available to the template so that we can access
     # the latitude, longitude and map API key to render the map
     def get_context(self, request):
         context = super(LocationPage, self).get_context(request)
-        context["lat"] = self.lat_long.split(",")[0]
-        context["long"] = self.lat_long.split(",")[1]
+        context["lat"] = self.latitude
+        context["long"] = self.longitude
         context["google_map_api_key"] = settings.GOOGLE_MAP_API_KEY
         return context
 
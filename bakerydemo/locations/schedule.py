@@ -0,0 +1,125 @@
+"""
+Weekly opening schedules for locations.
+
+A location's operating hours are compiled into a sorted list of
+non-overlapping (start, end) intervals, in minutes since midnight on Monday in
+the site's time zone. A location is open from the start minute up to, but not
+including, the end minute, which is the minute after it closes, as both the
+opening and closing times are within its operating hours. The list is small
+enough to cache, and answers whether a location is open, or when it next
+opens, without any queries.
+"""
+
+import bisect
+import datetime
+
+from django.utils import timezone
+
+from bakerydemo.locations.choices import DAY_CHOICES
+
+DAYS = [day for day, name in DAY_CHOICES]
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+def get_minutes(time):
+    return time.hour * 60 + time.minute
+
+
+def get_minute_of_week(at):
+    at = timezone.localtime(at)
+    return at.weekday() * MINUTES_PER_DAY + get_minutes(at)
+
+
+def compile_schedule(hours):
+    """
+    Returns the schedule for the given operating hours. Hours that close at
+    or before the time they open run past midnight into the next day. The
+    closing minute is included, so hours from 09:00 to 17:00 are open until
+    17:01.
+    """
+    intervals = []
+    for slot in hours:
+        if slot.closed or slot.opening_time is None or slot.closing_time is None:
+            continue
+
+        day_start = DAYS.index(slot.day) * MINUTES_PER_DAY
+        start = day_start + get_minutes(slot.opening_time)
+        end = day_start + get_minutes(slot.closing_time)
+        if end <= start:
+            end += MINUTES_PER_DAY
+        end += 1
+        if end > MINUTES_PER_WEEK:
+            # Open from Sunday night into Monday morning
+            intervals.append((0, end - MINUTES_PER_WEEK))
+            end = MINUTES_PER_WEEK
+        intervals.append((start, end))
+
+    schedule = []
+    for start, end in sorted(intervals):
+        if schedule and start <= schedule[-1][1]:
+            schedule[-1] = (schedule[-1][0], max(end, schedule[-1][1]))
+        else:
+            schedule.append((start, end))
+    return schedule
+
+
+def is_open(schedule, at):
+    minute = get_minute_of_week(at)
+    # The last interval starting at or before `minute`
+    index = bisect.bisect_right(schedule, (minute, MINUTES_PER_WEEK)) - 1
+    return index >= 0 and minute < schedule[index][1]
+
+
+def get_next_opening(schedule, at):
+    """
+    Returns when the location next opens after `at`, as an aware datetime in
+    the current time zone, or None if it's never open (or never closes).
+    """
+    # An interval from midnight on Monday continues one that runs to the end
+    # of Sunday, rather than being an opening of its own
+    openings = [
+        start
+        for start, end in schedule
+        if not (start == 0 and schedule[-1][1] == MINUTES_PER_WEEK)
+    ]
+    if not openings:
+        return None
+
+    minute = get_minute_of_week(at)
+    index = bisect.bisect_right(openings, minute)
+    if index < len(openings):
+        minutes_until = openings[index] - minute
+    else:
+        minutes_until = openings[0] + MINUTES_PER_WEEK - minute
+
+    # Arithmetic on aware datetimes keeps the wall clock time, so this is
+    # still the opening time on days the clocks change
+    at = timezone.localtime(at).replace(second=0, microsecond=0)
+    return at + datetime.timedelta(minutes=minutes_until)
+
+
+def get_next_change(schedule, at):
+    """
+    Returns when the location next opens or closes after `at`, as an aware
+    datetime, or None if it's always open or always closed.
+    """
+    changes = sorted(
+        {minute % MINUTES_PER_WEEK for interval in schedule for minute in interval}
+    )
+    # Closing at the end of Sunday and opening at midnight on Monday is no
+    # change at all
+    if schedule and schedule[0][0] == 0 and schedule[-1][1] == MINUTES_PER_WEEK:
+        changes.remove(0)
+    if not changes:
+        return None
+
+    minute = get_minute_of_week(at)
+    index = bisect.bisect_right(changes, minute)
+    if index < len(changes):
+        minutes_until = changes[index] - minute
+    else:
+        minutes_until = changes[0] + MINUTES_PER_WEEK - minute
+
+    at = timezone.localtime(at).replace(second=0, microsecond=0)
+    return at + datetime.timedelta(minutes=minutes_until)
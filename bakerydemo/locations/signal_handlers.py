@@ -0,0 +1,30 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete
+from wagtail.signals import page_published, page_unpublished, post_page_move
+
+from bakerydemo.base.cache import LOCATIONS, bump_generation
+from bakerydemo.locations.models import LocationPage
+
+
+def location_published_handler(instance, **kwargs):
+    # The operating hours may have changed in the published revision
+    instance.compile_schedule()
+    # As may the coordinates
+    bump_generation(LOCATIONS)
+
+
+def location_removed_handler(instance, **kwargs):
+    cache.delete(instance.get_schedule_cache_key())
+    bump_generation(LOCATIONS)
+
+
+def location_moved_handler(instance, **kwargs):
+    # The URLs in the location index have changed
+    bump_generation(LOCATIONS)
+
+
+def register_signal_handlers():
+    page_published.connect(location_published_handler, sender=LocationPage)
+    page_unpublished.connect(location_removed_handler, sender=LocationPage)
+    post_delete.connect(location_removed_handler, sender=LocationPage)
+    post_page_move.connect(location_moved_handler, sender=LocationPage)
@@ -0,0 +1,23 @@
+from django import template
+
+from bakerydemo.base import page_cache
+from bakerydemo.locations.geo import get_location_index
+
+register = template.Library()
+
+
+# Lists the live locations nearest to the given one, with their distances
+@register.inclusion_tag("tags/nearest_locations.html")
+def nearest_locations(location, count=3):
+    if location.latitude is None or location.longitude is None:
+        return {"nearest_locations": []}
+
+    index = get_location_index()
+    nearest = index.nearest(
+        location.latitude, location.longitude, count, exclude={location.pk}
+    )
+    page_cache.record_dependency(
+        *index.dependency_keys,
+        *(page_cache.get_page_surrogate_key(other.pk) for other, distance in nearest),
+    )
+    return {"nearest_locations": nearest}
@@ -0,0 +1,68 @@
+import datetime
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from bakerydemo.locations import schedule
+from bakerydemo.locations.models import LocationOperatingHours
+
+
+def monday_at(hour, minute, second=0, days=0):
+    # 1 January 2024 was a Monday
+    return timezone.make_aware(
+        datetime.datetime(2024, 1, 1 + days, hour, minute, second)
+    )
+
+
+class ScheduleTest(SimpleTestCase):
+    def compile(self, *hours):
+        return schedule.compile_schedule(
+            [
+                LocationOperatingHours(
+                    day=day,
+                    opening_time=datetime.time(*opening),
+                    closing_time=datetime.time(*closing),
+                )
+                for day, opening, closing in hours
+            ]
+        )
+
+    def test_open_from_opening_to_closing_time_inclusive(self):
+        hours = self.compile(("MON", (9, 0), (17, 0)))
+
+        for at, expected in [
+            (monday_at(8, 59, 59), False),
+            (monday_at(9, 0), True),
+            (monday_at(17, 0), True),
+            (monday_at(17, 0, 59), True),
+            (monday_at(17, 1), False),
+        ]:
+            with self.subTest(at=at):
+                self.assertIs(schedule.is_open(hours, at), expected)
+
+    def test_next_change_is_after_the_closing_minute(self):
+        hours = self.compile(("MON", (9, 0), (17, 0)))
+
+        self.assertEqual(
+            schedule.get_next_change(hours, monday_at(12, 0)), monday_at(17, 1)
+        )
+        self.assertEqual(
+            schedule.get_next_change(hours, monday_at(17, 1)), monday_at(9, 0, days=7)
+        )
+
+    def test_open_past_midnight_into_the_next_day(self):
+        hours = self.compile(("SUN", (18, 0), (2, 0)))
+
+        self.assertIs(schedule.is_open(hours, monday_at(2, 0)), True)
+        self.assertIs(schedule.is_open(hours, monday_at(2, 1)), False)
+        self.assertEqual(
+            schedule.get_next_opening(hours, monday_at(2, 0)), monday_at(18, 0, days=6)
+        )
+
+    def test_hours_closing_as_the_next_open_are_merged(self):
+        hours = self.compile(("MON", (9, 0), (12, 0)), ("MON", (12, 1), (17, 0)))
+
+        self.assertIs(schedule.is_open(hours, monday_at(12, 0, 30)), True)
+        self.assertEqual(
+            schedule.get_next_change(hours, monday_at(10, 0)), monday_at(17, 1)
+        )
@@ -0,0 +1,43 @@
+from django.http import JsonResponse
+
+from bakerydemo.locations.geo import get_location_index
+
+DEFAULT_NEAREST_COUNT = 5
+MAX_NEAREST_COUNT = 50
+
+
+def nearest_locations(request):
+    """
+    Returns the live locations nearest to the point given by the `lat` and
+    `long` parameters as JSON, nearest first. `count` sets how many, up to
+    `MAX_NEAREST_COUNT`.
+    """
+    try:
+        latitude = float(request.GET["lat"])
+        longitude = float(request.GET["long"])
+        count = int(request.GET.get("count", DEFAULT_NEAREST_COUNT))
+    except (KeyError, ValueError):
+        return JsonResponse(
+            {"error": "lat and long must be numbers, and count a whole number"},
+            status=400,
+        )
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return JsonResponse({"error": "lat or long is out of range"}, status=400)
+
+    count = max(0, min(count, MAX_NEAREST_COUNT))
+    nearest = get_location_index().nearest(latitude, longitude, count)
+    return JsonResponse(
+        {
+            "results": [
+                {
+                    "id": location.pk,
+                    "title": location.title,
+                    "url": location.url,
+                    "lat": location.latitude,
+                    "long": location.longitude,
+                    "distance_km": round(distance, 3),
+                }
+                for location, distance in nearest
+            ]
+        }
+    )
@@ -10,7 +10,14 @@ from wagtail.fields import RichTextField, StreamField
 from wagtail.models import Orderable, Page
 from wagtail.search import index
 
+from bakerydemo.base import page_cache
 from bakerydemo.base.blocks import BaseStreamBlock
+from bakerydemo.base.listings import (
+    PaginatedListingMixin,
+    get_card_queryset,
+    order_by_date_published,
+    prefetch_authors,
+)
 
 from .blocks import RecipeStreamBlock
 
@@ -115,13 +122,15 @@ class RecipePage(Page):
         with a loop on the template. If we tried to access the recipe_person_
         relationship directly we'd print `recipe.RecipePersonRelationship.None`
         """
-        # Only return authors that are not in draft
-        return [
-            n.person
-            for n in self.recipe_person_relationship.filter(
+        # Use the authors prefetched for a listing, if there are any (see
+        # `bakerydemo.base.listings.prefetch_authors`)
+        relationships = getattr(self, "_prefetched_authors", None)
+        if relationships is None:
+            # Only return authors that are not in draft
+            relationships = self.recipe_person_relationship.filter(
                 person__live=True
-            ).select_related("person")
-        ]
+            ).select_related("person__image")
+        return [n.person for n in relationships]
 
     # Specifies parent to Recipe as being RecipeIndexPages
     parent_page_types = ["RecipeIndexPage"]
@@ -131,7 +140,7 @@ class RecipePage(Page):
     subpage_types = []
 
 
-class RecipeIndexPage(Page):
+class RecipeIndexPage(PaginatedListingMixin, Page):
     """
     Index page for recipe.
     We need to alter the page model's context to return the child page objects,
@@ -147,17 +156,28 @@ class RecipeIndexPage(Page):
     # Specifies that only RecipePage objects can live under this index page
     subpage_types = ["RecipePage"]
 
+    # Recipes are listed a page at a time, newest first (see
+    # PaginatedListingMixin)
+    listing_context_name = "recipes"
+    listing_cards_template = "recipes/recipe_cards.html"
+    listing_ordering = ("-listing_date", "-id")
+
     # Defines a method to access the children of the page (e.g. RecipePage
     # objects).
     def children(self):
+        page_cache.record_dependency(page_cache.get_children_surrogate_key(self))
         return self.get_children().specific().live()
 
-    # Overrides the context to list all child items, that are live, by the
+    # Overrides the context to list the child items, that are live, by the
     # date that they were published
     # https://docs.wagtail.org/en/stable/getting_started/tutorial.html#overriding-context
     def get_context(self, request):
         context = super(RecipeIndexPage, self).get_context(request)
-        context["recipes"] = (
-            RecipePage.objects.descendant_of(self).live().order_by("-date_published")
+        recipes = prefetch_authors(
+            get_card_queryset(
+                order_by_date_published(RecipePage.objects.descendant_of(self).live())
+            ),
+            "recipe_person_relationship",
         )
+        context.update(self.get_listing_context(request, recipes))
         return context
@@ -0,0 +1,76 @@
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from wagtail.contrib.search_promotions.models import Query, QueryDailyHits
+from wagtail.search.utils import normalise_query_string
+
+logger = logging.getLogger(__name__)
+
+
+class SearchHitBuffer:
+    """
+    Collects search hits in memory and writes them to the database in
+    aggregated batches from a background thread, so that searching doesn't
+    wait on the get-or-create and update that `Query.add_hit` runs for each
+    hit, and popular queries don't contend on the same rows.
+
+    Each process has its own buffer, which is also flushed when the process
+    exits. Hits still buffered when a process is killed, or that fail to be
+    written, are lost, which is an acceptable trade-off for popularity
+    statistics.
+    """
+
+    def __init__(self, flush_interval):
+        self.flush_interval = flush_interval
+        self._hits = Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, query_string):
+        key = (normalise_query_string(query_string), timezone.now().date())
+        with self._lock:
+            self._hits[key] += 1
+            if self._thread is None:
+                self._start()
+
+    def _start(self):
+        # Started lazily, so that the thread runs in the process (e.g. a web
+        # server worker) that records the hits
+        self._thread = threading.Thread(
+            target=self._run, name="search-hit-buffer", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        stopped = threading.Event()
+        while not stopped.wait(self.flush_interval):
+            self.flush()
+            close_old_connections()
+
+    def flush(self):
+        with self._lock:
+            hits, self._hits = self._hits, Counter()
+
+        for (query_string, date), count in hits.items():
+            try:
+                with transaction.atomic():
+                    query = Query.get(query_string)
+                    daily_hits, created = QueryDailyHits.objects.get_or_create(
+                        query=query, date=date
+                    )
+                    QueryDailyHits.objects.filter(pk=daily_hits.pk).update(
+                        hits=F("hits") + count
+                    )
+            except Exception:
+                # Don't let one bad query string hold up the rest of the batch
+                logger.exception("Failed to record %d hits for %r", count, query_string)
+
+
+search_hits = SearchHitBuffer(flush_interval=settings.SEARCH_HITS_FLUSH_INTERVAL)
@@ -0,0 +1,101 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from wagtail.contrib.search_promotions.models import Query, SearchPromotion
+from wagtail.images import get_image_model
+from wagtail.images.models import Filter
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.models import Site
+
+from bakerydemo.base.models import GenericSettings, SiteSettings
+from bakerydemo.blog.models import BlogIndexPage, BlogPage
+from bakerydemo.breads.models import BreadPage, BreadsIndexPage
+from bakerydemo.search.views import PROMOTION_IMAGE_FILTERS
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+@mock.patch("bakerydemo.search.views.search_hits")
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        site = Site.objects.get(is_default_site=True)
+        GenericSettings.load()
+        SiteSettings.for_site(site)
+        home = site.root_page
+        image = get_image_model().objects.create(
+            title="Loaf", file=get_test_image_file()
+        )
+        # The renditions already exist, so the counts don't include making them
+        for filter_spec in PROMOTION_IMAGE_FILTERS:
+            for spec in Filter.expand_spec(filter_spec):
+                image.renditions.create(
+                    filter_spec=spec,
+                    focal_point_key=Filter(spec).get_cache_key(image),
+                    file=get_test_image_file(),
+                    width=180,
+                    height=180,
+                )
+
+        # Ten results across two page types, each with an image
+        breads_index = home.add_child(
+            instance=BreadsIndexPage(title="Breads", slug="breads")
+        )
+        blog_index = home.add_child(instance=BlogIndexPage(title="Blog", slug="blog"))
+        cls.pages = []
+        for number in range(5):
+            for index, model in ((breads_index, BreadPage), (blog_index, BlogPage)):
+                page = index.add_child(
+                    instance=model(
+                        title=f"Sourdough {model.__name__} {number}",
+                        slug=f"sourdough-{number}",
+                        image=image,
+                    )
+                )
+                page.save_revision().publish()
+                cls.pages.append(page)
+
+        # And promotions of the same pages for a search with no results
+        query = Query.get("promoted")
+        SearchPromotion.objects.bulk_create(
+            [
+                SearchPromotion(query=query, page=page, sort_order=order)
+                for order, page in enumerate(cls.pages)
+            ]
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def search(self, query):
+        response = self.client.get("/search/", {"q": query})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_results_take_a_fixed_number_of_queries(self, search_hits):
+        # A search that isn't cached runs the full text query and COUNT
+        with self.assertNumQueries(16):
+            response = self.search("sourdough")
+        self.assertEqual(len(response.context["search_results"]), 10)
+
+        # The same search again only fetches the pages from the cached IDs
+        with self.assertNumQueries(8):
+            self.search("sourdough")
+
+    def test_promotions_take_a_fixed_number_of_queries(self, search_hits):
+        with self.assertNumQueries(16):
+            response = self.search("promoted")
+        self.assertEqual(len(response.context["search_promotions"]), 10)
+
+        with self.assertNumQueries(8):
+            self.search("promoted")
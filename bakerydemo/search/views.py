@@ -1,56 +1,122 @@
-from django.conf import settings
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Paginator
 from django.shortcuts import render
-from wagtail.contrib.search_promotions.models import Query
+from wagtail.contrib.search_promotions.models import SearchPromotion
 from wagtail.models import Page
+from wagtail.search.utils import normalise_query_string
 
-from bakerydemo.blog.models import BlogPage
-from bakerydemo.breads.models import BreadPage
-from bakerydemo.locations.models import LocationPage
+from bakerydemo.base.cache import SEARCH_INDEX, make_key
+from bakerydemo.base.listings import get_specific_pages
+from bakerydemo.search.hits import search_hits
 
+# The renditions rendered by search/search_results.html for results and for
+# promoted pages, respectively
+RESULT_IMAGE_FILTERS = ["format-{avif,webp,jpeg} fill-180x180-c100"]
+PROMOTION_IMAGE_FILTERS = RESULT_IMAGE_FILTERS + ["fill-180x180-c100"]
 
-def search(request):
-    # Search
-    search_query = request.GET.get("q", None)
-    if search_query:
-        if "elasticsearch" in settings.WAGTAILSEARCH_BACKENDS["default"]["BACKEND"]:
-            # In production, use ElasticSearch and a simplified search query, per
-            # https://docs.wagtail.org/en/stable/topics/search/backends.html
-            # like this:
-            search_results = Page.objects.live().search(search_query)
-        else:
-            # If we aren't using ElasticSearch for the demo, fall back to native db search.
-            # But native DB search can't search specific fields in our models on a `Page` query.
-            # So for demo purposes ONLY, we hard-code in the model names we want to search.
-            blog_results = BlogPage.objects.live().search(search_query)
-            blog_page_ids = [p.page_ptr.id for p in blog_results]
+RESULTS_PER_PAGE = 10
+SEARCH_RESULTS_CACHE_TIMEOUT = 60 * 60
 
-            bread_results = BreadPage.objects.live().search(search_query)
-            bread_page_ids = [p.page_ptr.id for p in bread_results]
 
-            location_results = LocationPage.objects.live().search(search_query)
-            location_result_ids = [p.page_ptr.id for p in location_results]
+def get_search_promotions(search_query):
+    # Unlike the get_search_promotions template tag, this doesn't create a
+    # Query for every new search string, and it fetches the promoted pages
+    # along with their specific instances and images.
+    search_promotions = list(
+        SearchPromotion.objects.filter(
+            query__query_string=normalise_query_string(search_query)
+        ).select_related("page")
+    )
+    promoted = [promotion for promotion in search_promotions if promotion.page]
+    specific_pages = get_specific_pages(
+        [promotion.page for promotion in promoted], *PROMOTION_IMAGE_FILTERS
+    )
+    for promotion, page in zip(promoted, specific_pages):
+        promotion.page = page
+    return search_promotions
 
-            page_ids = blog_page_ids + bread_page_ids + location_result_ids
-            search_results = Page.objects.live().filter(id__in=page_ids)
 
-        query = Query.get(search_query)
+def get_search_results_page(search_query, page):
+    """
+    Returns the requested page of live pages matching `search_query`.
 
-        # Record hit
-        query.add_hit()
+    Only the IDs of the pages on the requested page and the total number of
+    results are cached, under the normalised query and page number, so that
+    repeated searches skip the full text query and COUNT. They're cached
+    until the search index generation is bumped by a page or person being
+    published, unpublished or deleted.
+    """
+    key = make_key(
+        "search-results",
+        normalise_query_string(search_query),
+        page,
+        namespace=SEARCH_INDEX,
+    )
+    cached = cache.get(key)
 
+    if cached is None:
+        paginator = Paginator(
+            Page.objects.live().search(search_query), RESULTS_PER_PAGE
+        )
+        search_results = paginator.page(page)
+        cached = {
+            "ids": [result.pk for result in search_results.object_list],
+            "count": paginator.count,
+        }
+        cache.set(key, cached, SEARCH_RESULTS_CACHE_TIMEOUT)
     else:
-        search_results = Page.objects.none()
+        # Rebuild the same Page without refetching the whole result set; the
+        # paginator only needs the count to work out the page range
+        paginator = Paginator(range(cached["count"]), RESULTS_PER_PAGE)
+        search_results = paginator.page(page)
+        pages = Page.objects.live().in_bulk(cached["ids"])
+        search_results.object_list = [pages[pk] for pk in cached["ids"] if pk in pages]
+
+    return search_results
+
+
+def search(request):
+    # Search
+    search_query = request.GET.get("q", None)
 
     # Pagination
     page = request.GET.get("page", 1)
-    paginator = Paginator(search_results, 10)
     try:
-        search_results = paginator.page(page)
-    except PageNotAnInteger:
-        search_results = paginator.page(1)
-    except EmptyPage:
-        search_results = paginator.page(paginator.num_pages)
+        page = int(page)
+    except (TypeError, ValueError):
+        page = 1
+
+    if search_query:
+        # Both Elasticsearch and the native database backend search the
+        # fields of every specific page model when querying Page, per
+        # https://docs.wagtail.org/en/stable/topics/search/backends.html
+        # so a single ranked query covers all page types. It stays lazy, and
+        # the paginator only fetches one page of results with LIMIT/OFFSET
+        # plus a COUNT, rather than every match.
+        try:
+            search_results = get_search_results_page(search_query, page)
+        except EmptyPage:
+            # Out of range page numbers get the last page, which is cached
+            # under its own number
+            num_pages = get_search_results_page(search_query, 1).paginator.num_pages
+            search_results = get_search_results_page(search_query, num_pages)
+
+        # Record hit. This is buffered and written to the database in
+        # batches by a background thread, off the request path.
+        search_hits.add(search_query)
+
+    else:
+        search_results = Paginator(Page.objects.none(), RESULTS_PER_PAGE).page(1)
+
+    # Fetch the specific pages and their images for the page of results in
+    # one query per page type, rather than several queries per result
+    search_results.object_list = get_specific_pages(
+        search_results.object_list, *RESULT_IMAGE_FILTERS
+    )
+
+    search_promotions = []
+    if search_query and not search_results:
+        search_promotions = get_search_promotions(search_query)
 
     return render(
         request,
@@ -58,5 +124,6 @@ def search(request):
         {
             "search_query": search_query,
             "search_results": search_results,
+            "search_promotions": search_promotions,
         },
     )
@@ -83,6 +83,7 @@ MIDDLEWARE = [
     # Uncomment to enable django-debug-toolbar
     # "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "bakerydemo.base.page_cache.PageCacheMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -193,6 +194,28 @@ WAGTAILSEARCH_BACKENDS = {
     },
 }
 
+# How often, in seconds, buffered search hits are written to the search
+# promotions query statistics. See bakerydemo/search/hits.py
+SEARCH_HITS_FLUSH_INTERVAL = int(os.environ.get("SEARCH_HITS_FLUSH_INTERVAL", 30))
+
+# How long, in seconds, responses of Wagtail pages served to anonymous users
+# are cached for, or 0 to disable the page cache. See bakerydemo/base/page_cache.py
+PAGE_CACHE_TIMEOUT = int(os.environ.get("PAGE_CACHE_TIMEOUT", 0))
+
+# Whether to record which snippets each page URL was rendered from, so that
+# publishing a snippet purges only those URLs from the frontend cache. Run the
+# prune_page_dependencies command daily to remove those of URLs no longer served
+TRACK_PAGE_DEPENDENCIES = (
+    os.environ.get("TRACK_PAGE_DEPENDENCIES", "false").lower().strip() == "true"
+)
+
+# Where `reset_demo --snapshot` keeps the database snapshot it restores from.
+# Anything in this directory may be restored over the database, so it must
+# only be writable by the user running the command
+RESET_DEMO_SNAPSHOT_DIR = os.environ.get(
+    "RESET_DEMO_SNAPSHOT_DIR", os.path.join(BASE_DIR, "snapshots")
+)
+
 # Wagtail settings
 WAGTAIL_SITE_NAME = "bakerydemo"
 
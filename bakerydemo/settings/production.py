@@ -88,6 +88,10 @@ else:
         }
     }
 
+# Cache the responses of pages served to anonymous users, until the content
+# they were rendered from changes
+PAGE_CACHE_TIMEOUT = int(os.getenv("PAGE_CACHE_TIMEOUT", 60 * 10))
+
 # Configure Elasticsearch, if present in os.environ
 ELASTICSEARCH_ENDPOINT = os.getenv("ELASTICSEARCH_ENDPOINT", "")
 
@@ -201,6 +205,9 @@ if (
         }
     }
 
+    # Purge the pages that show a snippet when it's changed
+    TRACK_PAGE_DEPENDENCIES = True
+
     if "FRONTEND_CACHE_CLOUDFLARE_TOKEN" in os.environ:
         # To use an account-wide API key, set the following:
         #  * $FRONTEND_CACHE_CLOUDFLARE_TOKEN
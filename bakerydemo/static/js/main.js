@@ -22,3 +22,40 @@ document.addEventListener('DOMContentLoaded', () => {
     toggleMobileNavigation();
   });
 });
+
+// "Load more" links add the next page of a listing in place, fetching just
+// its cards and the next link (see PaginatedListingMixin), and otherwise fall
+// back to loading the next page in full
+async function loadMore(link, loadMoreNav, listing) {
+  const url = new URL(link.href);
+  url.searchParams.set('fragment', '');
+
+  const response = await fetch(url);
+  if (!response.ok) {
+    window.location.href = link.href;
+    return;
+  }
+  const fragment = document.createElement('template');
+  fragment.innerHTML = await response.text();
+  const nextNav = fragment.content.querySelector('[data-load-more]');
+  if (nextNav) {
+    nextNav.remove();
+    loadMoreNav.replaceWith(nextNav);
+  } else {
+    loadMoreNav.remove();
+  }
+  listing.append(fragment.content);
+}
+
+document.addEventListener('click', (event) => {
+  const link = event.target.closest('[data-load-more-link]');
+  if (!link) {
+    return;
+  }
+  const loadMoreNav = link.closest('[data-load-more]');
+  const listing = loadMoreNav.parentElement.querySelector('[data-listing]');
+  if (listing) {
+    event.preventDefault();
+    loadMore(link, loadMoreNav, listing);
+  }
+});
@@ -8,6 +8,7 @@ from wagtail.contrib.sitemaps.views import sitemap
 from wagtail.documents import urls as wagtaildocs_urls
 from wagtail.images.views.serve import ServeView
 
+from bakerydemo.locations import views as location_views
 from bakerydemo.search import views as search_views
 
 from .api import api_router
@@ -22,6 +23,11 @@ urlpatterns = [
         name="wagtailimages_serve",
     ),
     path("search/", search_views.search, name="search"),
+    path(
+        "nearest-locations/",
+        location_views.nearest_locations,
+        name="nearest_locations",
+    ),
     path("sitemap.xml", sitemap),
     path("api/v2/", api_router.urls),
     path("__debug__/", include(debug_toolbar.urls)),